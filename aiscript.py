@@ -1,80 +1,323 @@
 import os
+import re
 import json
+import random
 import time
+import hashlib
+import orjson
+import requests
+import tiktoken
+import copy
+import threading
+from collections import deque
+from itertools import chain
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
-import PyPDF2
+import fitz  # PyMuPDF
+import numpy as np
+import faiss
+from sentence_transformers import SentenceTransformer
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 from typing import Dict, List, Any
 
 # Load environment variables from .env file
 load_dotenv()
 
-class GeminiPDFProcessor:
-    def __init__(self):
-        """
-        Initialize Gemini PDF Processor with API key from .env file
-        """
-        self.api_key = os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in .env file")
+MODEL_NAME = 'gemini-1.5-flash'
+
+# Bump whenever the default extraction prompt changes so stale cache entries are ignored
+PROMPT_VERSION = "v1"
+
+# Cached responses older than this are re-requested
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Gemini request quota and the number of PDFs processed concurrently (overridable in .env, at least 1)
+REQUESTS_PER_MINUTE = max(1, int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '60')))
+MAX_WORKERS = max(1, int(os.getenv('GEMINI_MAX_WORKERS', '8')))
+MAX_CHUNK_WORKERS = 4
+
+# Transient Gemini errors are retried with exponential backoff and full jitter. Dropped connections
+# surface as the builtin ConnectionError (socket level) or, over the REST transport, as requests' own.
+gemini_retry = retry(
+    wait=wait_random_exponential(multiplier=1, max=60),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type((
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        ConnectionError,
+        requests.exceptions.ConnectionError,
+    )),
+    reraise=True
+)
+
+# Polling interval bounds (seconds) while an uploaded file is PROCESSING
+UPLOAD_POLL_INITIAL_DELAY = 0.1
+UPLOAD_POLL_MAX_DELAY = 2.0
+
+# Entity categories collected under "important_entities" in the extraction schema
+ENTITY_TYPES = ["people", "organizations", "locations", "amounts", "dates", "references"]
+
+# Large PDFs are parsed in page ranges of this size so one document can use several cores
+PAGES_PER_EXTRACTION_TASK = 50
+
+# PDFs whose text is parsed in the background ahead of processing, per worker thread
+TEXT_PREFETCH_PER_WORKER = 2
+
+# PDFs yielding less text than this despite having pages are treated as scanned (image-only)
+MIN_TEXT_CHARS = 200
+
+# Records which PDFs were already extracted into an output directory
+MANIFEST_FILENAME = ".manifest.json"
+# Bump when the rule for recording a completed extraction changes so older manifest entries are re-checked
+MANIFEST_VERSION = 2
+
+# orjson options for the extracted JSON files (indented, UTF-8 output)
+JSON_OUTPUT_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# cl100k_base approximates Gemini's tokenizer; chunks stay below its ~30k-token input budget.
+# It is loaded on first use (tiktoken may download it), so fully cached runs never need it.
+TOKENIZER_ENCODING = "cl100k_base"
+MAX_CHUNK_TOKENS = 28000
+
+# A word with its surrounding whitespace; oversize sentences are hard-split on these boundaries
+WORD_RE = re.compile(r'\s*\S+\s*')
+
+# Shared decoder used to pull the first JSON object out of a response
+JSON_DECODER = json.JSONDecoder()
+
+# Markdown code fence wrapped around a response (anchored to the ends of the text only)
+MARKDOWN_FENCE_RE = re.compile(r'\A```(?:json)?\s*|\s*```\Z')
+
+# Patterns used to repair malformed JSON responses
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+AGGRESSIVE_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+LINE_BREAK_RE = re.compile(r'(["\w])\s*\n\s*(["\w])')
+UNESCAPED_QUOTE_RE = re.compile(r'(?<!\\)"(?=.*".*:)')
+UNQUOTED_KEY_RE = re.compile(r'(\w+):')
+SINGLE_QUOTED_RE = re.compile(r"'([^']*)'")
+
+# Embedding model and settings for the near-duplicate (semantic) cache
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))
+# all-MiniLM-L6-v2 truncates input at 256 tokens, so longer text would not change the embedding
+SEMANTIC_CACHE_TEXT_CHARS = 2000
+
+# An integer literal that may be too wide for orjson (which would turn it into a float on load and rejects
+# it on dump). The int64 limits are 19 digits long, so every literal of 19+ digits takes the stdlib path.
+LONG_INTEGER_RE = re.compile(r'\d{19,}')
+
+
+def loads_json(data):
+    """Parse JSON with orjson, using the stdlib parser when the text holds integers wider than 64 bits"""
+    text = data.decode('utf-8') if isinstance(data, bytes) else data
+    if LONG_INTEGER_RE.search(text):
+        return json.loads(text)
+    return orjson.loads(text)
+
+
+def dumps_json(obj, option: int = None) -> bytes:
+    """Serialize JSON with orjson, using the stdlib serializer for integers wider than 64 bits"""
+    try:
+        return orjson.dumps(obj, option=option)
+    except TypeError:
+        indent = 2 if option and option & orjson.OPT_INDENT_2 else None
+        return json.dumps(obj, ensure_ascii=False, indent=indent).encode('utf-8')
+
+
+def extract_pdf_text(pdf_path: str, start_page: int = 0, stop_page: int = None) -> str:
+    """
+    Extract text from a PDF file, optionally limited to pages [start_page, stop_page)
+
+    Module-level so it can run in a worker process.
+    """
+    with fitz.open(pdf_path) as doc:
+        stop_page = doc.page_count if stop_page is None else min(stop_page, doc.page_count)
+        text = "\n".join(doc[page_num].get_text("text") for page_num in range(start_page, stop_page))
+    return text.strip()
+
+
+class RateLimiter:
+    """
+    Thread-safe sliding-window rate limiter.
+
+    acquire() blocks only when `calls` requests have already been made in the
+    last `period` seconds, so requests go out back to back while under quota.
+    An optional `min_interval` additionally spaces out consecutive requests.
+    """
+
+    def __init__(self, calls: int, period: float = 60.0, min_interval: float = 0.0):
+        self.calls = calls
+        self.period = period
+        self.min_interval = min_interval
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until another request is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.period:
+                    self._timestamps.popleft()
+
+                if self._timestamps:
+                    wait = self._timestamps[-1] + self.min_interval - now
+                else:
+                    wait = 0.0
 
-        # Configure Gemini API
-        genai.configure(api_key=self.api_key)
+                if len(self._timestamps) >= self.calls:
+                    wait = max(wait, self.period - (now - self._timestamps[0]))
 
-        # Initialize model
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+                if wait <= 0:
+                    self._timestamps.append(now)
+                    return
+            time.sleep(wait)
 
-        # Generation config for consistent responses
-        self.generation_config = {
-            'temperature': 0.1,
-            'top_p': 0.8,
-            'top_k': 40,
-            'max_output_tokens': 8192,
-        }
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file"""
-        try:
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-            return text.strip()
-        except Exception as e:
-            print(f"Error extracting text from {pdf_path}: {e}")
-            return ""
+class SemanticCache:
+    """
+    Cache of extraction results for near-duplicate documents.
 
-    def upload_pdf_to_gemini(self, pdf_path: str):
-        """Upload PDF file to Gemini for processing"""
-        try:
-            uploaded_file = genai.upload_file(
-                path=pdf_path,
-                display_name=os.path.basename(pdf_path)
-            )
+    Documents are embedded locally from the start of their extracted text and
+    stored in a FAISS inner-product index; with normalized embeddings the
+    search score is the cosine similarity to the closest cached document.
+    """
 
-            # Wait for file to be processed
-            while uploaded_file.state.name == "PROCESSING":
-                print("Waiting for file to be processed...")
-                time.sleep(2)
-                uploaded_file = genai.get_file(uploaded_file.name)
+    def __init__(self, cache_dir: Path, threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.threshold = threshold
+        self.index_path = cache_dir / "semantic.faiss"
+        self.entries_path = cache_dir / "semantic_entries.jsonl"
 
-            if uploaded_file.state.name == "FAILED":
-                raise ValueError(f"File processing failed: {uploaded_file.state.name}")
+        self.encoder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        dimension = self.encoder.get_sentence_embedding_dimension()
 
-            return uploaded_file
+        self.index = faiss.IndexFlatIP(dimension)
+        self.entries = []
+        self._lock = threading.Lock()
+        self._dirty = False
 
-        except Exception as e:
-            print(f"Error uploading PDF to Gemini: {e}")
-            return None
+        if self.index_path.exists() and self.entries_path.exists():
+            try:
+                index = faiss.read_index(str(self.index_path))
+                with open(self.entries_path, 'rb') as f:
+                    entries = [loads_json(line) for line in f if line.strip()]
 
-    def get_content_extraction_prompt(self) -> str:
+                if index.ntotal == len(entries):
+                    self.index, self.entries = index, entries
+                    self._drop_expired()
+                else:
+                    # Remove the stale files so the next save() writes a consistent pair
+                    print("Warning: Semantic cache index and entries are out of sync, starting fresh")
+                    self.index_path.unlink(missing_ok=True)
+                    self.entries_path.unlink(missing_ok=True)
+            # ValueError covers malformed JSON and metadata that is not valid UTF-8
+            except (OSError, RuntimeError, ValueError) as e:
+                print(f"Warning: Could not load semantic cache: {e}")
+
+    def _drop_expired(self):
+        """Remove entries past CACHE_TTL_SECONDS from the index and entries; the caller holds the lock (or is __init__)"""
+        oldest_timestamp = time.time() - CACHE_TTL_SECONDS
+        expired_ids = [
+            idx for idx, entry in enumerate(self.entries)
+            if entry.get("timestamp", 0) < oldest_timestamp
+        ]
+        if not expired_ids:
+            return
+
+        # A flat index keeps the remaining vectors in order, so they stay aligned with the filtered entries
+        self.index.remove_ids(np.asarray(expired_ids, dtype='int64'))
+        expired = set(expired_ids)
+        self.entries = [entry for idx, entry in enumerate(self.entries) if idx not in expired]
+        self._dirty = True
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed the leading part of a document's text"""
+        embedding = self.encoder.encode(
+            [text[:SEMANTIC_CACHE_TEXT_CHARS]],
+            normalize_embeddings=True
+        )
+        return np.asarray(embedding, dtype='float32')
+
+    def lookup(self, embedding: np.ndarray, prompt_key: str, file_digest: str = None):
         """
-        Generate a focused prompt for content extraction that's LLM-friendly
+        Return (result, score) for the closest unexpired cached document processed with the same prompt
+
+        Entries for file_digest itself are skipped: an identical file whose
+        exact cache entry expired must be re-processed, not served its own stale result.
         """
-        return """
+        oldest_timestamp = time.time() - CACHE_TTL_SECONDS
+
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None, 0.0
+
+            # Entries for other prompts or for this file can outrank a usable match, so widen the
+            # search until a hit scores below the threshold or the whole index has been seen
+            k = min(5, self.index.ntotal)
+            checked = 0
+            while True:
+                scores, ids = self.index.search(embedding, k)
+                for score, idx in zip(scores[0][checked:], ids[0][checked:]):
+                    if score < self.threshold:
+                        return None, 0.0
+                    entry = self.entries[idx]
+                    if entry.get("timestamp", 0) < oldest_timestamp or entry.get("file_digest") == file_digest:
+                        continue
+                    if entry["prompt_key"] == prompt_key:
+                        return copy.deepcopy(entry["result"]), float(score)
+
+                if k == self.index.ntotal:
+                    break
+                checked = k
+                k = min(k * 4, self.index.ntotal)
+
+        return None, 0.0
+
+    def add(self, embedding: np.ndarray, prompt_key: str, result: Dict[str, Any], file_digest: str = None):
+        """Store a result in memory; call save() to persist it"""
+        entry = {
+            "prompt_key": prompt_key,
+            "file_digest": file_digest,
+            "timestamp": time.time(),
+            "result": copy.deepcopy(result)
+        }
+
+        with self._lock:
+            self.index.add(embedding)
+            self.entries.append(entry)
+            self._dirty = True
+
+    def save(self):
+        """Write the index and entries to disk if anything was added or expired since the last save"""
+        with self._lock:
+            self._drop_expired()
+            if not self._dirty:
+                return
+
+            # Each file is written to a temporary name and swapped in, so a crash never leaves a half-written one
+            index_tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            entries_tmp_path = self.entries_path.with_name(self.entries_path.name + ".tmp")
+            try:
+                faiss.write_index(self.index, str(index_tmp_path))
+                with open(entries_tmp_path, 'wb') as f:
+                    for entry in self.entries:
+                        f.write(dumps_json(entry, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+
+                os.replace(index_tmp_path, self.index_path)
+                os.replace(entries_tmp_path, self.entries_path)
+                self._dirty = False
+            except (OSError, RuntimeError) as e:
+                print(f"Warning: Could not save semantic cache: {e}")
+
+
+class GeminiPDFProcessor:
+    # Focused, LLM-friendly content extraction prompt used for every PDF and chunk unless a custom prompt is given
+    CONTENT_EXTRACTION_PROMPT = """
         Extract and structure ALL meaningful content from this document in a clean, organized JSON format.
         Focus on making the content easily understandable and queryable by language models.
 
@@ -151,80 +394,376 @@ class GeminiPDFProcessor:
         8. Focus on substance, not formatting artifacts
         """
 
-    def process_pdf_with_gemini(self, pdf_path: str, custom_prompt: str = None) -> Dict[str, Any]:
-        """Process PDF using Gemini API"""
-        
+    def __init__(self, use_semantic_cache: bool = True, min_interval: float = 0.0):
+        """
+        Initialize Gemini PDF Processor with API key from .env file
+
+        Args:
+            use_semantic_cache (bool): Reuse results of near-duplicate documents
+            min_interval (float): Minimum seconds between Gemini requests
+        """
+        self.api_key = os.getenv('GEMINI_API_KEY')
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY not found in .env file")
+
+        # Configure Gemini API
+        genai.configure(api_key=self.api_key)
+
+        # Initialize model
+        self.model = genai.GenerativeModel(MODEL_NAME)
+
+        # Generation config for consistent responses
+        self.generation_config = {
+            'temperature': 0.1,
+            'top_p': 0.8,
+            'top_k': 40,
+            'max_output_tokens': 8192,
+        }
+
+        self.default_prompt = self.CONTENT_EXTRACTION_PROMPT
+
+        # Shared across worker threads so concurrent requests stay within quota
+        self.rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, min_interval=min_interval)
+
+        # On-disk cache of parsed responses, keyed by PDF bytes + prompt + model settings
+        self.cache_dir = Path(".gemini_cache")
+        self.cache_dir.mkdir(exist_ok=True)
+
+        self.semantic_cache = SemanticCache(self.cache_dir) if use_semantic_cache else None
+
+        # Background text extractions (futures per page range) started by process_directory, keyed by PDF path;
+        # only a bounded window of upcoming PDFs is parsed ahead at any time
+        self.pending_texts = {}
+
+        # Every file uploaded during this run (deleted by cleanup_uploaded_files), and the
+        # shared upload of each distinct PDF as a Future keyed by SHA-256 of its contents
+        self.uploaded_files = []
+        self.upload_futures = {}
+        self.uploaded_files_lock = threading.Lock()
+
+    @gemini_retry
+    def generate_with_rate_limit(self, contents):
+        """Call the Gemini model once the rate limiter allows another request"""
+        self.rate_limiter.acquire()
+        return self.model.generate_content(
+            contents,
+            generation_config=self.generation_config
+        )
+
+    def extract_text_from_pdf(self, pdf_path: str) -> str:
+        """Extract text from PDF file, using the result of a background extraction if one is pending"""
+        pending_parts = self.pending_texts.pop(pdf_path, None)
+        if pending_parts is not None:
+            try:
+                return "\n".join(filter(None, (part.result() for part in pending_parts)))
+            except Exception as e:
+                # A broken pool or failed part must not pass for an empty (scanned-looking) PDF
+                print(f"Warning: Background text extraction failed for {pdf_path}, extracting in-thread: {e}")
+                for part in pending_parts:
+                    part.cancel()
+
+        try:
+            return extract_pdf_text(pdf_path)
+        except Exception as e:
+            print(f"Error extracting text from {pdf_path}: {e}")
+            return ""
+
+    def discard_pending_text(self, pdf_path: str):
+        """Drop a background extraction that will not be used, cancelling it if it has not started"""
+        for part in self.pending_texts.pop(pdf_path, None) or []:
+            part.cancel()
+
+    def prefetch_text(self, text_pool: ProcessPoolExecutor, pdf_path: str):
+        """Start background extraction for a PDF; if the pool is unusable the text is extracted in-thread later"""
+        try:
+            parts = self.submit_text_extraction(text_pool, pdf_path)
+        except RuntimeError as e:
+            # BrokenProcessPool (a worker crashed or was killed) is a RuntimeError, as is submitting after shutdown.
+            # Record the failure so extract_text_from_pdf takes its in-thread fallback.
+            print(f"Warning: Could not queue background text extraction for {pdf_path}: {e}")
+            failed = Future()
+            failed.set_exception(e)
+            parts = [failed]
+        self.pending_texts[pdf_path] = parts
+
+    def submit_text_extraction(self, text_pool: ProcessPoolExecutor, pdf_path: str) -> List[Future]:
+        """Queue background extraction, splitting large PDFs into page ranges parsed on several cores"""
+        try:
+            with fitz.open(pdf_path) as doc:
+                page_count = doc.page_count
+        except Exception:
+            page_count = 0  # Let the worker report the error
+
+        if page_count <= PAGES_PER_EXTRACTION_TASK:
+            return [text_pool.submit(extract_pdf_text, pdf_path)]
+
+        parts = []
+        try:
+            for start_page in range(0, page_count, PAGES_PER_EXTRACTION_TASK):
+                parts.append(text_pool.submit(
+                    extract_pdf_text, pdf_path, start_page, start_page + PAGES_PER_EXTRACTION_TASK
+                ))
+        except RuntimeError:
+            # Page ranges already queued are useless without the rest
+            for part in parts:
+                part.cancel()
+            raise
+        return parts
+
+    @gemini_retry
+    def upload_file_with_retry(self, pdf_path: str):
+        """Upload a file to the Gemini File API"""
+        return genai.upload_file(
+            path=pdf_path,
+            display_name=os.path.basename(pdf_path)
+        )
+
+    @gemini_retry
+    def get_file_with_retry(self, name: str):
+        """Fetch the current state of an uploaded file"""
+        return genai.get_file(name)
+
+    def get_file_digest(self, pdf_path: str) -> str:
+        """SHA-256 of the file contents"""
+        with open(pdf_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def upload_pdf_to_gemini(self, pdf_path: str, file_digest: str = None):
+        """
+        Upload PDF file to Gemini for processing
+
+        Identical files are uploaded only once per run, even when processed
+        concurrently; call cleanup_uploaded_files() once processing is finished.
+        """
+        try:
+            file_digest = file_digest or self.get_file_digest(pdf_path)
+
+            # Claim the digest under the lock so concurrent identical files wait for one upload
+            with self.uploaded_files_lock:
+                upload_future = self.upload_futures.get(file_digest)
+                is_uploader = upload_future is None
+                if is_uploader:
+                    upload_future = self.upload_futures[file_digest] = Future()
+
+            if not is_uploader:
+                previous_upload = upload_future.result()
+                if previous_upload is not None:
+                    uploaded_file = self.get_file_with_retry(previous_upload.name)
+                    if uploaded_file.state.name == "ACTIVE":
+                        print(f"Reusing uploaded copy of {os.path.basename(pdf_path)}")
+                        return uploaded_file
+                # The shared upload failed or expired; upload a private copy
+                return self.upload_and_wait(pdf_path)
+
+            uploaded_file = None
+            try:
+                uploaded_file = self.upload_and_wait(pdf_path)
+                return uploaded_file
+            finally:
+                # Wake any identical files waiting on this upload (None makes them upload their own copy)
+                upload_future.set_result(uploaded_file)
+
+        except Exception as e:
+            print(f"Error uploading PDF to Gemini: {e}")
+            return None
+
+    def upload_and_wait(self, pdf_path: str):
+        """Upload a PDF, record it for cleanup and wait until Gemini has processed it"""
+        uploaded_file = self.upload_file_with_retry(pdf_path)
+        with self.uploaded_files_lock:
+            self.uploaded_files.append(uploaded_file)
+
+        # Wait for file to be processed, polling quickly at first since small PDFs finish fast
+        poll_delay = UPLOAD_POLL_INITIAL_DELAY
+        while uploaded_file.state.name == "PROCESSING":
+            print("Waiting for file to be processed...")
+            time.sleep(poll_delay)
+            poll_delay = min(poll_delay * 1.5, UPLOAD_POLL_MAX_DELAY) + random.uniform(0, 0.05)
+            uploaded_file = self.get_file_with_retry(uploaded_file.name)
+
+        if uploaded_file.state.name == "FAILED":
+            raise ValueError(f"File processing failed: {uploaded_file.state.name}")
+
+        return uploaded_file
+
+    def cleanup_uploaded_files(self):
+        """Delete every file uploaded to Gemini during this run"""
+        with self.uploaded_files_lock:
+            uploaded_files = list(self.uploaded_files)
+            self.uploaded_files.clear()
+            self.upload_futures.clear()
+
+        # Deletes are independent control-plane calls, so issue them concurrently
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            list(executor.map(self.delete_uploaded_file, uploaded_files))
+
+    def delete_uploaded_file(self, uploaded_file):
+        """Delete a single uploaded file, warning instead of raising on failure"""
+        try:
+            genai.delete_file(uploaded_file.name)
+        except Exception as e:
+            print(f"Warning: Could not delete uploaded file {uploaded_file.name}: {e}")
+
+    def get_content_extraction_prompt(self) -> str:
+        """Return the default content extraction prompt"""
+        return self.default_prompt
+
+    def get_prompt_key(self, processing_prompt: str) -> str:
+        """Hash the prompt together with the model configuration"""
+        return hashlib.sha256(
+            processing_prompt.encode('utf-8')
+            + PROMPT_VERSION.encode('utf-8')
+            + MODEL_NAME.encode('utf-8')
+            + json.dumps(self.generation_config, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+    def get_cache_key(self, file_digest: str, prompt_key: str) -> str:
+        """Build the cache key for a PDF + prompt + model configuration"""
+        return hashlib.sha256((file_digest + prompt_key).encode('utf-8')).hexdigest()
+
+    def is_cacheable_result(self, result: Dict[str, Any]) -> bool:
+        """
+        Errors, raw-content fallbacks and partially merged documents are worth retrying on the next run
+
+        Semantic cache hits are another document's result, so a false match
+        must not become this file's permanent result either.
+        """
+        if "error" in result or result.get("failed_chunks"):
+            return False
+        if result.get("processing_method") == "semantic_cache_hit":
+            return False
+        return not result.get("_metadata", {}).get("processing_method", "").endswith("_fallback")
+
+    def load_cached_result(self, cache_key: str):
+        """Return a previously cached result, or None on a cache miss"""
+        cache_path = self.cache_dir / f"{cache_key}.json"
+        try:
+            age_seconds = time.time() - cache_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+        if age_seconds > CACHE_TTL_SECONDS:
+            cache_path.unlink(missing_ok=True)
+            return None
+
+        try:
+            with open(cache_path, 'rb') as f:
+                return loads_json(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable cache entry {cache_path}: {e}")
+            return None
+
+    def save_cached_result(self, cache_key: str, result: Dict[str, Any]):
+        """Persist a successful result so identical requests skip the API"""
+        if not self.is_cacheable_result(result):
+            return
+
+        cache_path = self.cache_dir / f"{cache_key}.json"
+        try:
+            payload = dumps_json(result, option=orjson.OPT_NON_STR_KEYS)
+            with open(cache_path, 'wb') as f:
+                f.write(payload)
+        except (OSError, TypeError) as e:
+            # A cache write failure must never turn a paid API call into a failed file
+            print(f"Warning: Could not write cache entry {cache_path}: {e}")
+
+    def process_pdf_with_gemini(self, pdf_path: str, custom_prompt: str = None,
+                                file_digest: str = None) -> Dict[str, Any]:
+        """
+        Process PDF using Gemini API, reusing cached results when available
+
+        The upload is kept so identical PDFs can reuse it; callers outside
+        process_directory() must call cleanup_uploaded_files() when done.
+        """
+
         # Use custom prompt or default content extraction prompt
-        processing_prompt = custom_prompt or self.get_content_extraction_prompt()
+        processing_prompt = custom_prompt or self.default_prompt
 
+        prompt_key = self.get_prompt_key(processing_prompt)
+        try:
+            file_digest = file_digest or self.get_file_digest(pdf_path)
+        except OSError as e:
+            print(f"Error reading PDF {pdf_path}: {e}")
+            return {"error": str(e), "file": pdf_path}
+
+        cache_key = self.get_cache_key(file_digest, prompt_key)
+        cached_result = self.load_cached_result(cache_key)
+        if cached_result is not None:
+            print(f"Cache hit for {pdf_path}")
+            self.discard_pending_text(pdf_path)
+            return cached_result
+
+        # Look for an already processed near-duplicate before calling Gemini
+        pdf_text = None
+        embedding = None
+        if self.semantic_cache:
+            pdf_text = self.extract_text_from_pdf(pdf_path)
+            # Near-empty text from scanned PDFs would make unrelated scans look alike
+            if len(pdf_text) >= MIN_TEXT_CHARS:
+                embedding = self.semantic_cache.embed(pdf_text)
+                similar_result, score = self.semantic_cache.lookup(embedding, prompt_key, file_digest)
+                if similar_result is not None:
+                    print(f"Semantic cache hit for {pdf_path} (similarity {score:.3f})")
+                    similar_result["processing_method"] = "semantic_cache_hit"
+                    similar_result["semantic_similarity"] = score
+                    return similar_result
+
+        result = self.call_gemini_for_pdf(pdf_path, processing_prompt, file_digest, pdf_text)
+        self.save_cached_result(cache_key, result)
+        if embedding is not None and self.is_cacheable_result(result):
+            self.semantic_cache.add(embedding, prompt_key, result, file_digest)
+        return result
+
+    def call_gemini_for_pdf(self, pdf_path: str, processing_prompt: str,
+                            file_digest: str = None, pdf_text: str = None) -> Dict[str, Any]:
+        """Upload the PDF to Gemini, falling back to text extraction on failure"""
         try:
             # Try direct PDF upload first
-            uploaded_file = self.upload_pdf_to_gemini(pdf_path)
+            uploaded_file = self.upload_pdf_to_gemini(pdf_path, file_digest)
 
             if uploaded_file:
                 try:
-                    response = self.model.generate_content(
-                        [uploaded_file, processing_prompt],
-                        generation_config=self.generation_config
-                    )
-
-                    response_text = response.text
+                    response = self.generate_with_rate_limit([uploaded_file, processing_prompt])
 
-                    # Clean up uploaded file
-                    try:
-                        genai.delete_file(uploaded_file.name)
-                    except:
-                        pass
-
-                    return self.parse_json_response(response_text, "direct_upload")
+                    return self.parse_json_response(response.text, "direct_upload")
 
                 except Exception as api_error:
                     print(f"Direct PDF processing failed: {api_error}")
-                    # Clean up uploaded file
-                    try:
-                        genai.delete_file(uploaded_file.name)
-                    except:
-                        pass
                     # Fallback to text extraction
-                    return self.process_text_with_gemini(pdf_path, processing_prompt)
+                    return self.process_text_with_gemini(pdf_path, processing_prompt, pdf_text)
             else:
                 # Fallback to text extraction method
-                return self.process_text_with_gemini(pdf_path, processing_prompt)
+                return self.process_text_with_gemini(pdf_path, processing_prompt, pdf_text)
 
         except Exception as e:
             print(f"Error processing PDF {pdf_path}: {e}")
             return {"error": str(e), "file": pdf_path}
 
-    def process_text_with_gemini(self, pdf_path: str, processing_prompt: str) -> Dict[str, Any]:
+    def process_text_with_gemini(self, pdf_path: str, processing_prompt: str, pdf_text: str = None) -> Dict[str, Any]:
         """Fallback method: Extract text first, then process with Gemini"""
         print(f"Using text extraction fallback for {pdf_path}")
 
-        # Extract text from PDF
-        pdf_text = self.extract_text_from_pdf(pdf_path)
+        # Extract text from PDF unless the caller already did
+        if pdf_text is None:
+            pdf_text = self.extract_text_from_pdf(pdf_path)
+
+        if self.is_scanned_pdf(pdf_path, pdf_text):
+            # Without a text layer the text request is bound to fail, so skip the API call
+            print(f"Skipping text fallback for scanned PDF {pdf_path}")
+            return {"error": "PDF appears to be scanned (no text layer)", "file": pdf_path, "is_scanned": True}
 
         if not pdf_text:
             return {"error": "Could not extract text from PDF", "file": pdf_path}
 
-        # Handle long documents by splitting if necessary
-        max_chars = 100000  # Approximately 25k tokens
-        if len(pdf_text) > max_chars:
-            # Try to split at natural boundaries (double newlines, section breaks)
-            chunks = self.smart_text_split(pdf_text, max_chars)
-            if len(chunks) > 1:
-                return self.process_multi_chunk_document(chunks, processing_prompt, pdf_path)
-            else:
-                # Fallback to simple truncation
-                pdf_text = pdf_text[:max_chars] + "\n\n[TEXT TRUNCATED - DOCUMENT CONTINUES]"
-                print(f"Warning: Text truncated for {pdf_path} due to length")
+        # Handle long documents by splitting at natural boundaries (double newlines, section breaks)
+        chunks = self.smart_text_split(pdf_text)
+        if len(chunks) > 1:
+            return self.process_multi_chunk_document(chunks, processing_prompt, pdf_path)
 
         # Process with Gemini
         try:
-            full_prompt = f"{processing_prompt}\n\nDocument content:\n{pdf_text}"
-
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=self.generation_config
-            )
+            # Pass the prompt and document as separate parts rather than concatenating a copy of the text
+            response = self.generate_with_rate_limit([processing_prompt, "Document content:", pdf_text])
 
             return self.parse_json_response(response.text, "text_extraction")
 
@@ -232,204 +771,217 @@ class GeminiPDFProcessor:
             print(f"Error processing text with Gemini: {e}")
             return {"error": str(e), "file": pdf_path}
 
-    def smart_text_split(self, text: str, max_chars: int) -> List[str]:
-        """Split text intelligently at natural boundaries"""
-        if len(text) <= max_chars:
+    def is_scanned_pdf(self, pdf_path: str, pdf_text: str) -> bool:
+        """Return True if the PDF has pages but (almost) no extractable text"""
+        if len(pdf_text) >= MIN_TEXT_CHARS:
+            return False
+        try:
+            with fitz.open(pdf_path) as doc:
+                return doc.page_count > 0
+        except Exception:
+            return False
+
+    def smart_text_split(self, text: str, max_tokens: int = MAX_CHUNK_TOKENS) -> List[str]:
+        """Split text intelligently at natural boundaries into chunks of at most max_tokens tokens"""
+        # tiktoken keeps loaded encodings, so only the first call pays for loading it
+        tokenizer = tiktoken.get_encoding(TOKENIZER_ENCODING)
+
+        # Split by double newlines first (paragraphs), counting tokens in one batch.
+        # Each paragraph is counted with the separator it is rejoined with, so chunks can't exceed max_tokens.
+        paragraphs = [para + "\n\n" for para in text.split('\n\n')]
+        paragraph_tokens = [len(tokens) for tokens in tokenizer.encode_batch(paragraphs, disallowed_special=())]
+
+        if sum(paragraph_tokens) <= max_tokens:
             return [text]
 
         chunks = []
-        current_chunk = ""
-        
-        # Split by double newlines first (paragraphs)
-        paragraphs = text.split('\n\n')
-        
-        for para in paragraphs:
-            # If adding this paragraph would exceed limit
-            if len(current_chunk) + len(para) + 2 > max_chars:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = para
-                else:
-                    # Single paragraph is too long, split by sentences
-                    sentences = para.split('. ')
-                    for sentence in sentences:
-                        if len(current_chunk) + len(sentence) + 2 > max_chars:
-                            if current_chunk:
-                                chunks.append(current_chunk.strip())
-                                current_chunk = sentence
-                            else:
-                                # Even single sentence too long, truncate
-                                chunks.append(sentence[:max_chars])
-                                current_chunk = ""
-                        else:
-                            current_chunk += sentence + ". "
+        current_parts = []
+        current_tokens = 0
+
+        for para, para_tokens in zip(paragraphs, paragraph_tokens):
+            if para_tokens <= max_tokens:
+                pieces = [(para, para_tokens)]
             else:
-                current_chunk += para + "\n\n"
-        
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        
+                # Single paragraph is too long, split by sentences (the last one keeps the paragraph separator)
+                sentences = para.split('. ')
+                sentences = [sentence + ". " for sentence in sentences[:-1]] + sentences[-1:]
+                sentence_tokens = [len(tokens) for tokens in tokenizer.encode_batch(sentences, disallowed_special=())]
+                pieces = list(chain.from_iterable(
+                    # Even single sentence too long, split it at whitespace rather than dropping the tail
+                    self.split_at_whitespace(sentence, max_tokens) if tokens > max_tokens else [(sentence, tokens)]
+                    for sentence, tokens in zip(sentences, sentence_tokens)
+                ))
+
+            for piece, piece_tokens in pieces:
+                # If adding this piece would exceed the limit, start a new chunk
+                if current_parts and current_tokens + piece_tokens > max_tokens:
+                    chunks.append("".join(current_parts).strip())
+                    current_parts = []
+                    current_tokens = 0
+
+                current_parts.append(piece)
+                current_tokens += piece_tokens
+
+        if current_parts:
+            chunks.append("".join(current_parts).strip())
+
         return chunks
 
+    def split_at_whitespace(self, text: str, max_tokens: int) -> List[tuple]:
+        """Split text at whitespace into (piece, token_count) pairs of at most max_tokens tokens"""
+        tokenizer = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        words = WORD_RE.findall(text)
+        word_tokens = [len(tokens) for tokens in tokenizer.encode_batch(words, disallowed_special=())]
+
+        pieces = []
+        current_words = []
+        current_tokens = 0
+
+        for word, tokens in zip(words, word_tokens):
+            if current_words and current_tokens + tokens > max_tokens:
+                pieces.append(("".join(current_words), current_tokens))
+                current_words = []
+                current_tokens = 0
+
+            if tokens > max_tokens:
+                # A single unbroken run of characters, fall back to token boundaries
+                encoded = tokenizer.encode(word, disallowed_special=())
+                for start in range(0, len(encoded), max_tokens):
+                    window = encoded[start:start + max_tokens]
+                    pieces.append((tokenizer.decode(window), len(window)))
+                continue
+
+            current_words.append(word)
+            current_tokens += tokens
+
+        if current_words:
+            pieces.append(("".join(current_words), current_tokens))
+
+        return pieces
+
+    def process_chunk(self, chunk: str, index: int, total: int, processing_prompt: str) -> Dict[str, Any]:
+        """Process a single chunk of a larger document"""
+        print(f"Processing chunk {index}/{total}")
+
+        chunk_instructions = (
+            f"This is part {index} of {total} of a larger document. "
+            "Extract all content from this section following the same JSON structure. "
+            f'Mark this as "chunk_{index}_of_{total}" in the response.'
+        )
+
+        try:
+            response = self.generate_with_rate_limit(
+                [chunk_instructions, processing_prompt, "Document section content:", chunk]
+            )
+            return self.parse_json_response(response.text, f"chunk_{index}")
+
+        except Exception as e:
+            print(f"Error processing chunk {index}: {e}")
+            return {"error": str(e), "chunk": index}
+
     def process_multi_chunk_document(self, chunks: List[str], processing_prompt: str, pdf_path: str) -> Dict[str, Any]:
         """Process document that was split into multiple chunks"""
         print(f"Processing {len(chunks)} chunks for {pdf_path}")
-        
-        chunk_results = []
-        
-        for i, chunk in enumerate(chunks, 1):
-            print(f"Processing chunk {i}/{len(chunks)}")
-            
-            chunk_prompt = f"""
-            This is part {i} of {len(chunks)} of a larger document. 
-            Extract all content from this section following the same JSON structure.
-            Mark this as "chunk_{i}_of_{len(chunks)}" in the response.
-            
-            {processing_prompt}
-            
-            Document section content:
-            {chunk}
-            """
-            
-            try:
-                response = self.model.generate_content(
-                    chunk_prompt,
-                    generation_config=self.generation_config
-                )
-                
-                chunk_result = self.parse_json_response(response.text, f"chunk_{i}")
-                chunk_results.append(chunk_result)
-                
-                # Brief delay between chunks
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error processing chunk {i}: {e}")
-                chunk_results.append({"error": str(e), "chunk": i})
+
+        # Chunks are independent requests; the shared rate limiter handles pacing
+        with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_CHUNK_WORKERS)) as executor:
+            futures = [
+                executor.submit(self.process_chunk, chunk, i, len(chunks), processing_prompt)
+                for i, chunk in enumerate(chunks, 1)
+            ]
+            # Futures are kept in submission order so chunks merge in document order
+            chunk_results = [future.result() for future in futures]
 
         # Merge chunk results into a single comprehensive result
         return self.merge_chunk_results(chunk_results, pdf_path)
 
     def merge_chunk_results(self, chunk_results: List[Dict], pdf_path: str) -> Dict[str, Any]:
         """Merge results from multiple chunks into a single comprehensive result"""
+        # Errors and raw-content fallbacks carry no structured content to merge
+        failed_chunks = [
+            index for index, chunk_result in enumerate(chunk_results, 1)
+            if "error" in chunk_result
+            or chunk_result.get("_metadata", {}).get("processing_method", "").endswith("_fallback")
+        ]
+        successful = [
+            chunk_result for index, chunk_result in enumerate(chunk_results, 1) if index not in failed_chunks
+        ]
+        if not successful:
+            return {"error": f"All {len(chunk_results)} chunks failed", "file": pdf_path}
+
+        main_contents = [chunk_result.get("main_content") or {} for chunk_result in successful]
+        entities = [chunk_result.get("important_entities") or {} for chunk_result in successful]
+
+        def concat(results: List[Dict], field: str) -> List[Any]:
+            """Concatenate a list field across chunks in a single pass"""
+            return list(chain.from_iterable(result.get(field) or [] for result in results))
+
         merged = {
-            "document_info": {},
+            # Take the first non-empty document info and purpose
+            "document_info": next(
+                (chunk_result["document_info"] for chunk_result in successful if chunk_result.get("document_info")), {}
+            ),
             "main_content": {
-                "purpose": "",
-                "summary": "",
-                "key_points": []
+                "purpose": next((content["purpose"] for content in main_contents if content.get("purpose")), ""),
+                "summary": " ".join(content["summary"] for content in main_contents if content.get("summary")),
+                # Remove duplicates preserving order
+                "key_points": list(dict.fromkeys(concat(main_contents, "key_points")))
             },
-            "detailed_sections": [],
-            "rules_and_provisions": [],
-            "penalties_and_consequences": [],
+            "detailed_sections": concat(successful, "detailed_sections"),
+            "rules_and_provisions": concat(successful, "rules_and_provisions"),
+            "penalties_and_consequences": concat(successful, "penalties_and_consequences"),
             "important_entities": {
-                "people": [],
-                "organizations": [],
-                "locations": [],
-                "amounts": [],
-                "dates": [],
-                "references": []
+                entity_type: list(dict.fromkeys(concat(entities, entity_type)))
+                for entity_type in ENTITY_TYPES
             },
-            "action_items": [],
-            "definitions": [],
-            "full_text_content": "",
+            "action_items": concat(successful, "action_items"),
+            "definitions": concat(successful, "definitions"),
+            "full_text_content": "\n\n".join(
+                chunk_result["full_text_content"] for chunk_result in successful if chunk_result.get("full_text_content")
+            ),
             "processing_method": "multi_chunk",
             "total_chunks": len(chunk_results)
         }
-
-        # Merge data from all chunks
-        for chunk_result in chunk_results:
-            if "error" in chunk_result:
-                continue
-                
-            # Merge document info (take first non-empty values)
-            if not merged["document_info"] and chunk_result.get("document_info"):
-                merged["document_info"] = chunk_result["document_info"]
-            
-            # Merge main content
-            main_content = chunk_result.get("main_content", {})
-            if main_content.get("purpose") and not merged["main_content"]["purpose"]:
-                merged["main_content"]["purpose"] = main_content["purpose"]
-            
-            if main_content.get("summary"):
-                merged["main_content"]["summary"] += " " + main_content["summary"]
-            
-            if main_content.get("key_points"):
-                merged["main_content"]["key_points"].extend(main_content["key_points"])
-            
-            # Merge sections and other arrays
-            for field in ["detailed_sections", "rules_and_provisions", "penalties_and_consequences", "action_items", "definitions"]:
-                if chunk_result.get(field):
-                    merged[field].extend(chunk_result[field])
-            
-            # Merge entities
-            entities = chunk_result.get("important_entities", {})
-            for entity_type in merged["important_entities"]:
-                if entities.get(entity_type):
-                    merged["important_entities"][entity_type].extend(entities[entity_type])
-            
-            # Concatenate full text
-            if chunk_result.get("full_text_content"):
-                merged["full_text_content"] += "\n\n" + chunk_result["full_text_content"]
-
-        # Clean up duplicates
-        for entity_type in merged["important_entities"]:
-            merged["important_entities"][entity_type] = list(set(merged["important_entities"][entity_type]))
-        
-        merged["main_content"]["key_points"] = list(dict.fromkeys(merged["main_content"]["key_points"]))  # Remove duplicates preserving order
-        
+        if failed_chunks:
+            # Partial results are saved but not cached, so the document is retried on the next run
+            print(f"Warning: {len(failed_chunks)} of {len(chunk_results)} chunks failed for {pdf_path}")
+            merged["failed_chunks"] = failed_chunks
         return merged
 
     def parse_json_response(self, response_text: str, method: str) -> Dict[str, Any]:
         """Parse JSON from Gemini response and return the clean JSON directly"""
         try:
-            # Clean response text
-            cleaned_text = response_text.strip()
-            
-            # Remove markdown formatting more carefully
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:].strip()
-            elif cleaned_text.startswith('```'):
-                cleaned_text = cleaned_text[3:].strip()
-            
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text[:-3].strip()
+            # Clean response text and remove markdown code fences
+            cleaned_text = MARKDOWN_FENCE_RE.sub('', response_text.strip())
 
             # Try direct parsing first (in case it's clean JSON)
             try:
-                parsed_json = json.loads(cleaned_text)
+                parsed_json = loads_json(cleaned_text)
+            except json.JSONDecodeError:
+                # The stdlib parser accepts a few things orjson rejects (e.g. NaN)
+                try:
+                    parsed_json = json.loads(cleaned_text)
+                except json.JSONDecodeError:
+                    parsed_json = None  # Continue to more complex parsing
+
+            if isinstance(parsed_json, dict):
                 parsed_json["_metadata"] = {
                     "processing_method": method,
                     "processed_timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
                 }
                 return parsed_json
-            except json.JSONDecodeError:
-                pass  # Continue to more complex parsing
 
-            # Find JSON boundaries using brace matching
-            brace_count = 0
-            start_idx = -1
-            end_idx = -1
-            
-            for i, char in enumerate(cleaned_text):
-                if char == '{':
-                    if start_idx == -1:
-                        start_idx = i
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0 and start_idx != -1:
-                        end_idx = i + 1
-                        break
-
-            if start_idx != -1 and end_idx != -1:
-                json_str = cleaned_text[start_idx:end_idx]
-                
-                # Clean up common JSON issues
-                json_str = self.clean_json_string(json_str)
-                
-                # Parse and return the clean JSON directly
-                parsed_json = json.loads(json_str)
+            # Decode the first JSON object; raw_decode stops where the object ends
+            start_idx = cleaned_text.find('{')
+            end_idx = cleaned_text.rfind('}') + 1
+
+            if start_idx != -1 and end_idx > start_idx:
+                try:
+                    parsed_json, _ = JSON_DECODER.raw_decode(cleaned_text, start_idx)
+                except json.JSONDecodeError:
+                    # Clean up common JSON issues and decode again
+                    json_str = self.clean_json_string(cleaned_text[start_idx:end_idx])
+                    parsed_json, _ = JSON_DECODER.raw_decode(json_str)
                 
                 # Add minimal metadata
                 parsed_json["_metadata"] = {
@@ -448,26 +1000,19 @@ class GeminiPDFProcessor:
             print(f"Warning: JSON decode error - {e}")
             # Try aggressive cleanup and retry
             try:
-                if 'start_idx' in locals() and 'end_idx' in locals() and start_idx != -1 and end_idx != -1:
+                if start_idx != -1 and end_idx > start_idx:
                     json_str = cleaned_text[start_idx:end_idx]
-                    json_str = self.aggressive_json_cleanup(json_str)
-                    parsed_json = json.loads(json_str)
-                    parsed_json["_metadata"] = {
-                        "processing_method": f"{method}_repaired",
-                        "processed_timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "note": "JSON was automatically repaired"
-                    }
-                    return parsed_json
                 else:
                     # Try aggressive cleanup on the whole cleaned text
-                    json_str = self.aggressive_json_cleanup(cleaned_text)
-                    parsed_json = json.loads(json_str)
-                    parsed_json["_metadata"] = {
-                        "processing_method": f"{method}_repaired",
-                        "processed_timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "note": "JSON was automatically repaired"
-                    }
-                    return parsed_json
+                    json_str = cleaned_text
+                json_str = self.aggressive_json_cleanup(json_str)
+                parsed_json = json.loads(json_str)
+                parsed_json["_metadata"] = {
+                    "processing_method": f"{method}_repaired",
+                    "processed_timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "note": "JSON was automatically repaired"
+                }
+                return parsed_json
             except:
                 pass
             
@@ -510,141 +1055,286 @@ class GeminiPDFProcessor:
 
     def aggressive_json_cleanup(self, json_str: str) -> str:
         """More aggressive JSON cleanup for problematic responses"""
-        import re
-        
         # Remove control characters and invisible characters
-        json_str = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_str)
+        json_str = CONTROL_CHARS_RE.sub('', json_str)
         
         # Fix common escaping issues
         json_str = json_str.replace('\\"', '"')
         json_str = json_str.replace('\\\\', '\\')
         
         # Fix trailing commas more aggressively
-        json_str = re.sub(r',\s*}', '}', json_str)
-        json_str = re.sub(r',\s*]', ']', json_str)
+        json_str = AGGRESSIVE_TRAILING_COMMA_RE.sub(r'\1', json_str)
         
         # Fix broken strings across lines
-        json_str = re.sub(r'(["\w])\s*\n\s*(["\w])', r'\1 \2', json_str)
+        json_str = LINE_BREAK_RE.sub(r'\1 \2', json_str)
         
         # Fix missing quotes on keys
-        json_str = re.sub(r'(\w+):', r'"\1":', json_str)
+        json_str = UNQUOTED_KEY_RE.sub(r'"\1":', json_str)
         
         # Fix single quotes to double quotes
-        json_str = re.sub(r"'([^']*)'", r'"\1"', json_str)
+        json_str = SINGLE_QUOTED_RE.sub(r'"\1"', json_str)
         
         return json_str
 
     def clean_json_string(self, json_str: str) -> str:
         """Clean up common JSON formatting issues"""
-        import re
-        
         # Remove control characters
-        json_str = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_str)
+        json_str = CONTROL_CHARS_RE.sub('', json_str)
         
         # Fix trailing commas
-        json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
+        json_str = TRAILING_COMMA_RE.sub(r'\1', json_str)
         
         # Fix broken strings across lines
-        json_str = re.sub(r'(["\w])\s*\n\s*(["\w])', r'\1 \2', json_str)
+        json_str = LINE_BREAK_RE.sub(r'\1 \2', json_str)
         
         # Fix unescaped quotes in strings
-        json_str = re.sub(r'(?<!\\)"(?=.*".*:)', '\\"', json_str)
+        json_str = UNESCAPED_QUOTE_RE.sub('\\"', json_str)
         
         return json_str
 
+    def load_manifest(self, output_directory: str) -> Dict[str, Any]:
+        """Load the record of PDFs already extracted into output_directory"""
+        manifest_path = os.path.join(output_directory, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return {}
+
+        try:
+            with open(manifest_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"Warning: Ignoring unreadable manifest {manifest_path}: {e}")
+            return {}
+
+    def save_manifest(self, output_directory: str, manifest: Dict[str, Any]):
+        """Persist the manifest of extracted PDFs"""
+        manifest_path = os.path.join(output_directory, MANIFEST_FILENAME)
+        with open(manifest_path, 'wb') as f:
+            f.write(orjson.dumps(manifest, option=JSON_OUTPUT_OPTIONS))
+
+    def is_unchanged(self, pdf_entry: os.DirEntry, manifest_entry: Dict[str, Any], output_directory: str,
+                     prompt_key: str) -> bool:
+        """Check whether a PDF was already extracted with the same prompt and model settings and has not changed since"""
+        if not manifest_entry or manifest_entry.get("version") != MANIFEST_VERSION:
+            return False
+        if manifest_entry.get("prompt_key") != prompt_key:
+            return False
+        if not os.path.exists(os.path.join(output_directory, manifest_entry["output_file"])):
+            return False
+
+        stat = pdf_entry.stat()
+        if stat.st_size == manifest_entry["size"] and stat.st_mtime == manifest_entry["mtime"]:
+            return True
+
+        # Same size but a new mtime (e.g. the file was copied or touched); compare contents
+        if stat.st_size == manifest_entry["size"] and self.get_file_digest(pdf_entry.path) == manifest_entry["sha256"]:
+            manifest_entry["mtime"] = stat.st_mtime
+            return True
+
+        return False
+
+    def process_single_file(self, pdf_entry: os.DirEntry, output_directory: str, custom_prompt: str = None) -> Dict[str, Any]:
+        """Process one PDF, save its JSON output and return a summary entry"""
+        name = pdf_entry.name
+        stem = os.path.splitext(name)[0]
+        print(f"▶️  Processing: {name}")
+
+        try:
+            # Process PDF
+            file_digest = self.get_file_digest(pdf_entry.path)
+            processed_data = self.process_pdf_with_gemini(pdf_entry.path, custom_prompt, file_digest)
+
+            # Create output filename
+            output_filename = f"{stem}_extracted.json"
+            output_path = os.path.join(output_directory, output_filename)
+
+            # Add file metadata
+            processed_data["source_file"] = name
+            processed_data["file_size_bytes"] = pdf_entry.stat().st_size
+            processed_data["extraction_timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+            # Save JSON file
+            payload = dumps_json(processed_data, option=JSON_OUTPUT_OPTIONS)
+            with open(output_path, 'wb') as f:
+                f.write(payload)
+
+            # Only a small summary entry outlives this call
+            method = processed_data.get("processing_method", "unknown")
+            summary = processed_data.get("main_content", {}).get("summary", "")
+            completed = self.is_cacheable_result(processed_data)
+            is_scanned = processed_data.get("is_scanned", False)
+            del processed_data
+
+            print(f"✓ Successfully extracted content from {name} to: {output_filename}")
+
+            # Show brief summary
+            if summary:
+                print(f"📄 Summary: {summary[:200]}...")
+
+            file_result = {
+                "file": name,
+                "status": "success",
+                "output": output_filename,
+                "method": method
+            }
+            if is_scanned:
+                file_result["is_scanned"] = True
+            # Only complete extractions are recorded so failures (including partial
+            # multi-chunk merges, which is_cacheable_result rejects) are retried on the next run
+            if completed:
+                file_result["sha256"] = file_digest
+            return file_result
+
+        except Exception as e:
+            print(f"✗ Failed to process {name}: {e}")
+            return {
+                "file": name,
+                "status": "failed",
+                "error": str(e)
+            }
+
+    def process_file_with_prefetch(self, index: int, pdf_files: List[os.DirEntry], text_pool: ProcessPoolExecutor,
+                                   prefetch: int, output_directory: str, custom_prompt: str = None) -> Dict[str, Any]:
+        """Start background text extraction `prefetch` files ahead, then process pdf_files[index]"""
+        pdf_entry = pdf_files[index]
+        if text_pool and index + prefetch < len(pdf_files):
+            self.prefetch_text(text_pool, pdf_files[index + prefetch].path)
+
+        try:
+            return self.process_single_file(pdf_entry, output_directory, custom_prompt)
+        finally:
+            # Cache hits and early failures never consume their extraction
+            self.discard_pending_text(pdf_entry.path)
+
     def process_directory(self,
                          pdf_directory: str,
                          output_directory: str,
                          custom_prompt: str = None,
-                         delay_seconds: float = 3.0) -> Dict[str, Any]:
-        """Process all PDFs in a directory"""
+                         max_workers: int = MAX_WORKERS) -> Dict[str, Any]:
+        """Process all PDFs in a directory concurrently, paced by the rate limiter"""
 
         # Create output directory
         os.makedirs(output_directory, exist_ok=True)
 
-        # Find PDF files
-        pdf_files = list(Path(pdf_directory).glob("*.pdf"))
+        # Find PDF files; DirEntry caches its stat() result for later size lookups
+        with os.scandir(pdf_directory) as entries:
+            pdf_files = [
+                entry for entry in entries
+                if entry.name.lower().endswith('.pdf') and entry.is_file()
+            ]
 
         if not pdf_files:
             print(f"No PDF files found in {pdf_directory}")
             return {"error": "No PDF files found"}
 
-        print(f"Found {len(pdf_files)} PDF files to process")
+        # Skip PDFs that were already extracted and have not changed since
+        manifest = self.load_manifest(output_directory)
+        prompt_key = self.get_prompt_key(custom_prompt or self.default_prompt)
+        skipped_files = [
+            entry for entry in pdf_files
+            if self.is_unchanged(entry, manifest.get(entry.name), output_directory, prompt_key)
+        ]
+        for entry in skipped_files:
+            print(f"⏭️  Skipping {entry.name} (unchanged)")
+        skipped_names = {entry.name for entry in skipped_files}
+        pdf_files = [entry for entry in pdf_files if entry.name not in skipped_names]
+
+        print(f"Found {len(pdf_files)} PDF files to process with {max_workers} workers")
+
+        # Per-file results are streamed to a JSON Lines file so partial progress survives a crash
+        results_filename = "extraction_summary.jsonl"
+        results_path = os.path.join(output_directory, results_filename)
 
         results = {
-            "total_files": len(pdf_files),
+            "total_files": len(pdf_files) + len(skipped_files),
+            "skipped_unchanged": len(skipped_files),
             "processed_successfully": 0,
             "failed": 0,
-            "results": [],
+            "scanned": 0,
+            "results_file": results_filename,
             "processing_started": time.strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        for i, pdf_path in enumerate(pdf_files, 1):
-            print(f"\n{'='*60}")
-            print(f"Processing {i}/{len(pdf_files)}: {pdf_path.name}")
-            print(f"{'='*60}")
+        # The semantic cache needs each PDF's text, so parse it on other cores in the background,
+        # a bounded window of files ahead of the worker threads so parsed text doesn't pile up.
+        # The pool is no larger than the first window, which is submitted before the worker
+        # threads start, so every process is forked up front rather than mid-run.
+        text_pool = None
+        prefetch = TEXT_PREFETCH_PER_WORKER * max_workers
+        if self.semantic_cache and pdf_files:
+            text_pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, prefetch))
+            for pdf_entry in pdf_files[:prefetch]:
+                self.prefetch_text(text_pool, pdf_entry.path)
 
-            try:
-                # Process PDF
-                processed_data = self.process_pdf_with_gemini(str(pdf_path), custom_prompt)
-
-                # Create output filename
-                output_filename = f"{pdf_path.stem}_extracted.json"
-                output_path = os.path.join(output_directory, output_filename)
-
-                # Add file metadata
-                processed_data["source_file"] = pdf_path.name
-                processed_data["file_size_bytes"] = pdf_path.stat().st_size
-                processed_data["extraction_timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
-
-                # Save JSON file
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(processed_data, f, indent=2, ensure_ascii=False)
-
-                print(f"✓ Successfully extracted content to: {output_filename}")
-                
-                # Show brief summary
-                if "main_content" in processed_data:
-                    summary = processed_data["main_content"].get("summary", "")
-                    if summary:
-                        print(f"📄 Summary: {summary[:200]}...")
-
-                results["processed_successfully"] += 1
-                results["results"].append({
-                    "file": pdf_path.name,
-                    "status": "success",
-                    "output": output_filename,
-                    "method": processed_data.get("processing_method", "unknown")
-                })
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, open(results_path, 'wb') as results_file:
+                # The summary is rewritten each run, so list unchanged files as well
+                for entry in skipped_files:
+                    results_file.write(orjson.dumps({
+                        "file": entry.name,
+                        "status": "skipped",
+                        "output": manifest[entry.name]["output_file"]
+                    }) + b"\n")
+                results_file.flush()
+
+                # Files start in submission order, so each one tops up the extraction window
+                futures = {
+                    executor.submit(
+                        self.process_file_with_prefetch, index, pdf_files, text_pool, prefetch,
+                        output_directory, custom_prompt
+                    ): pdf_entry
+                    for index, pdf_entry in enumerate(pdf_files)
+                }
 
-            except Exception as e:
-                print(f"✗ Failed to process {pdf_path.name}: {e}")
-                results["failed"] += 1
-                results["results"].append({
-                    "file": pdf_path.name,
-                    "status": "failed",
-                    "error": str(e)
-                })
-
-            # Delay between requests
-            if i < len(pdf_files):
-                print(f"⏱️  Waiting {delay_seconds} seconds before next file...")
-                time.sleep(delay_seconds)
+                for i, future in enumerate(as_completed(futures), 1):
+                    file_result = future.result()
+                    if "sha256" in file_result:
+                        stat = futures[future].stat()
+                        manifest[file_result["file"]] = {
+                            "version": MANIFEST_VERSION,
+                            "prompt_key": prompt_key,
+                            "sha256": file_result["sha256"],
+                            "size": stat.st_size,
+                            "mtime": stat.st_mtime,
+                            "output_file": file_result["output"]
+                        }
+                    results_file.write(orjson.dumps(file_result) + b"\n")
+                    results_file.flush()
+                    if file_result.get("is_scanned"):
+                        results["scanned"] += 1
+                    if file_result["status"] == "success":
+                        results["processed_successfully"] += 1
+                    else:
+                        results["failed"] += 1
+                    print(f"📊 Progress: {i}/{len(pdf_files)} files done")
+        finally:
+            if text_pool:
+                text_pool.shutdown(cancel_futures=True)
+            self.pending_texts = {}
+            # Persisted once per run rather than on every add
+            if self.semantic_cache:
+                self.semantic_cache.save()
+            # Uploads are shared between identical files, so delete them only once all are done
+            self.cleanup_uploaded_files()
+
+        self.save_manifest(output_directory, manifest)
 
         # Save summary
         results["processing_completed"] = time.strftime("%Y-%m-%d %H:%M:%S")
         summary_path = os.path.join(output_directory, "extraction_summary.json")
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        with open(summary_path, 'wb') as f:
+            f.write(orjson.dumps(results, option=JSON_OUTPUT_OPTIONS))
 
         print(f"\n{'='*60}")
         print(f"EXTRACTION COMPLETE")
         print(f"{'='*60}")
         print(f"📊 Total files: {results['total_files']}")
+        print(f"⏭️  Skipped (unchanged): {results['skipped_unchanged']}")
         print(f"✅ Successfully processed: {results['processed_successfully']}")
         print(f"❌ Failed: {results['failed']}")
+        print(f"🖼️  Scanned (no text layer): {results['scanned']}")
         print(f"📁 Results saved to: {output_directory}")
         print(f"📋 Summary: {summary_path}")
+        print(f"🧾 Per-file results: {results_path}")
 
         return results
 
@@ -654,6 +1344,13 @@ def create_env_template():
 GEMINI_API_KEY=your_gemini_api_key_here
 
 # Get your API key from: https://makersuite.google.com/app/apikey
+
+# Optional: requests per minute allowed by your quota, and PDFs processed concurrently
+# GEMINI_REQUESTS_PER_MINUTE=60
+# GEMINI_MAX_WORKERS=8
+
+# Optional: cosine similarity above which a near-duplicate PDF reuses a cached result
+# SEMANTIC_CACHE_THRESHOLD=0.95
 """
 
     if not os.path.exists('.env'):
@@ -707,23 +1404,30 @@ def main():
             prompt_lines.append(line)
         custom_prompt = "\n".join(prompt_lines[:-2])
 
-    # Set delay
-    delay = input("⏱️  Enter delay between requests in seconds (default: 3): ").strip()
+    # Set concurrency; the rate limiter keeps requests within the API quota
+    workers = input(f"🧵 Enter number of PDFs to process concurrently (default: {MAX_WORKERS}): ").strip()
+    try:
+        max_workers = max(1, int(workers)) if workers else MAX_WORKERS
+    except ValueError:
+        max_workers = MAX_WORKERS
+
+    # Optional spacing between requests for users who want to be gentler than the quota
+    interval = input("⏱️  Enter minimum seconds between API requests (default: 0): ").strip()
     try:
-        delay_seconds = float(delay) if delay else 3.0
+        min_interval = max(0.0, float(interval)) if interval else 0.0
     except ValueError:
-        delay_seconds = 3.0
+        min_interval = 0.0
 
     # Start processing
     try:
         print("🚀 Initializing Gemini PDF Content Extractor...")
-        processor = GeminiPDFProcessor()
+        processor = GeminiPDFProcessor(min_interval=min_interval)
 
         results = processor.process_directory(
             pdf_directory=pdf_dir,
             output_directory=output_dir,
             custom_prompt=custom_prompt,
-            delay_seconds=delay_seconds
+            max_workers=max_workers
         )
 
     except Exception as e:
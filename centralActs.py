@@ -1,5 +1,10 @@
 import os
+import shelve
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, unquote
 
@@ -8,14 +13,41 @@ DOWNLOAD_DIR = "centtral_acts"
 if not os.path.exists(DOWNLOAD_DIR):
     os.makedirs(DOWNLOAD_DIR)
 
+# PDFs saved by earlier runs or queued in this one; their downloads are skipped.
+# Names are claimed under the lock before a download is queued so no two downloads write the same file.
+downloaded_pdfs = set(os.listdir(DOWNLOAD_DIR))
+downloaded_pdfs_lock = threading.Lock()
+
+# Persistent inner page URL -> PDF URL mapping, so later runs skip the inner page fetch
+SCRAPE_CACHE_PATH = ".scrape_cache"
+scrape_cache_lock = threading.Lock()
+
 # A stable base URL for starting the scrape.
 # The server will add the necessary temporary tokens when we access it via a session.
 START_URL = "https://www.indiacode.nic.in/handle/123456789/1362/browse?type=shorttitle&sort_by=1&order=ASC&rpp=100"
 BASE_URL = "https://www.indiacode.nic.in"
 
+# Number of inner pages fetched concurrently for each listing page
+INNER_PAGE_WORKERS = 16
+
+# PDF downloads run on their own, smaller pool so large files don't hold up page discovery
+DOWNLOAD_WORKERS = 8
+
+# Bytes read from the network and written to disk per iteration when saving a PDF
+DOWNLOAD_CHUNK_SIZE = 262144
+
+# CSS selectors for the "View" link in the fourth column of a listing row and the PDF link on an inner page
+VIEW_LINK_SELECTOR = "td:nth-of-type(4) a[href]"
+PDF_LINK_SELECTOR = 'a[href*=".pdf"]'
+
 # Create a session object to persist cookies and headers
 session = requests.Session()
 
+# Keep enough pooled keep-alive connections for every concurrent inner-page fetch and download
+adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
 # Update the session with headers to mimic a real browser
 session.headers.update({
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -24,81 +56,170 @@ session.headers.update({
     'Connection': 'keep-alive',
 })
 
-def download_pdf(pdf_url, folder):
-    """Downloads a PDF from a given URL using our session."""
+def pdf_filename(pdf_url):
+    """Returns the local filename a PDF URL is saved under."""
+    return unquote(os.path.basename(pdf_url))
+
+def download_pdf(pdf_url, pdf_name, folder):
+    """Downloads a PDF from a given URL using our session, saving it as pdf_name."""
+    file_path = os.path.join(folder, pdf_name)
     try:
-        pdf_name = unquote(os.path.basename(pdf_url))
         print(f"    -> Attempting to download: {pdf_name}")
         
         response = session.get(pdf_url, stream=True, timeout=30)
         response.raise_for_status()  # Raise an exception for bad status codes
         
-        file_path = os.path.join(folder, pdf_name)
-        with open(file_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
+        # Write to a temporary name so an interrupted download is never mistaken for a finished one
+        with open(file_path + ".part", "wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                 f.write(chunk)
+        os.replace(file_path + ".part", file_path)
         print(f"    ✅ Successfully downloaded {pdf_name}")
-    except requests.exceptions.RequestException as e:
+    # Besides network errors, a full disk or failed rename (OSError) must not leave the claim or .part file behind
+    except (requests.exceptions.RequestException, Urllib3HTTPError, OSError) as e:
         print(f"    ❌ Error downloading {pdf_url}: {e}")
+        try:
+            os.remove(file_path + ".part")
+        except OSError:
+            pass
+        # Release the claim so a later link to the same PDF can retry it
+        with downloaded_pdfs_lock:
+            downloaded_pdfs.discard(pdf_name)
+
+def queue_pdf(pdf_url, download_executor):
+    """Queues a PDF download unless the PDF is already downloaded or queued, returning its future."""
+    pdf_name = pdf_filename(pdf_url)
+    with downloaded_pdfs_lock:
+        if pdf_name in downloaded_pdfs:
+            print(f"    - Already downloaded or queued: {pdf_name}")
+            return None
+        downloaded_pdfs.add(pdf_name)
+    return download_executor.submit(download_pdf, pdf_url, pdf_name, DOWNLOAD_DIR)
+
+def process_inner_page(inner_page_url, scrape_cache, download_executor):
+    """Finds the PDF link on an act's inner page and queues its download, returning the download's future."""
+    with scrape_cache_lock:
+        cached_pdf_url = scrape_cache.get(inner_page_url)
+    if cached_pdf_url:
+        return queue_pdf(cached_pdf_url, download_executor)
+
+    print(f"  > Visiting: {inner_page_url}")
+
+    try:
+        inner_response = session.get(inner_page_url, timeout=20)
+        inner_response.raise_for_status()
+        inner_soup = BeautifulSoup(inner_response.content, "lxml")
+
+        # Find the first link pointing at a ".pdf"
+        pdf_link_tag = inner_soup.select_one(PDF_LINK_SELECTOR)
+        if pdf_link_tag:
+            pdf_url = urljoin(BASE_URL, pdf_link_tag['href'])
+            with scrape_cache_lock:
+                scrape_cache[inner_page_url] = pdf_url
+            return queue_pdf(pdf_url, download_executor)
+        print(f"    - No PDF link found on page.")
+
+    except requests.exceptions.RequestException as e:
+        print(f"  - Error accessing inner page {inner_page_url}: {e}")
+    return None
+
+def parse_listing_page(content):
+    """Returns the inner page URLs and the next page URL from a listing page, or None if the table is missing."""
+    soup = BeautifulSoup(content, "lxml")
+
+    table = soup.find("table", class_="panel")
+    if not table:
+        return None
+
+    # Find all links inside the fourth column (td) of each data row (tr)
+    rows = table.select("tr:has(td)") # Selects only rows with data cells
+    if not rows:
+        print("No data rows found on this page.")
+
+    inner_page_urls = []
+    for row in rows:
+        view_link_tag = row.select_one(VIEW_LINK_SELECTOR)
+        if view_link_tag:
+            inner_page_urls.append(urljoin(BASE_URL, view_link_tag["href"]))
+
+    # Find the "next page" link, identified by its image content
+    next_page_tag = soup.find("a", href=True, title="Next Page")
+    next_page_url = urljoin(BASE_URL, next_page_tag["href"]) if next_page_tag else None
+
+    return inner_page_urls, next_page_url
+
+def fetch_listing_page(page_url, scrape_cache):
+    """Fetches and parses a listing page, reusing the cached result when the server reports it unchanged."""
+    cache_key = f"listing:{page_url}"
+    cached = scrape_cache.get(cache_key)
+
+    headers = {}
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = session.get(page_url, headers=headers, timeout=20)
+    if response.status_code == 304 and cached:
+        print("  (listing page not modified, using cached rows)")
+        return cached["inner_page_urls"], cached["next_page_url"]
+    response.raise_for_status()
+
+    listing = parse_listing_page(response.content)
+    if listing and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+        scrape_cache[cache_key] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "inner_page_urls": listing[0],
+            "next_page_url": listing[1],
+        }
+    return listing
 
 def scrape_website():
     """Scrapes the website using a session to handle tokens and headers."""
     current_page_url = START_URL
     page_count = 1
-    
-    while current_page_url:
-        print(f"\n--- Scraping Page {page_count}: {current_page_url} ---")
-        try:
-            response = session.get(current_page_url, timeout=20)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+    visited_inner_pages = set()
+    download_futures = []
+
+    with shelve.open(SCRAPE_CACHE_PATH) as scrape_cache, \
+            ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as download_executor:
+        while current_page_url:
+            print(f"\n--- Scraping Page {page_count}: {current_page_url} ---")
+            try:
+                listing = fetch_listing_page(current_page_url, scrape_cache)
+                if listing is None:
+                    print("Could not find the main data table. The website structure may have changed.")
+                    break
+                listed_urls, next_page_url = listing
+
+                # The same act can be listed more than once; visit its page only once per run
+                inner_page_urls = [url for url in dict.fromkeys(listed_urls) if url not in visited_inner_pages]
+                visited_inner_pages.update(inner_page_urls)
+
+                # Inner pages are independent, so fetch them concurrently; their PDFs download in the background
+                with ThreadPoolExecutor(max_workers=INNER_PAGE_WORKERS) as executor:
+                    download_futures.extend(filter(None, executor.map(
+                        lambda url: process_inner_page(url, scrape_cache, download_executor), inner_page_urls
+                    )))
+
+                if next_page_url:
+                    current_page_url = next_page_url
+                    page_count += 1
+                else:
+                    current_page_url = None
+                    print("\n--- No 'Next Page' link found. Scraping complete. ---")
 
-            table = soup.find("table", class_="panel")
-            if not table:
-                print("Could not find the main data table. The website structure may have changed.")
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Critical error accessing page {current_page_url}: {e}")
                 break
 
-            # Find all links inside the fourth column (td) of each data row (tr)
-            rows = table.select("tr:has(td)") # Selects only rows with data cells
-            if not rows:
-                print("No data rows found on this page.")
-
-            for row in rows:
-                cells = row.find_all("td")
-                if len(cells) >= 4:
-                    view_link_tag = cells[3].find("a", href=True)
-                    if view_link_tag:
-                        inner_page_url = urljoin(BASE_URL, view_link_tag["href"])
-                        print(f"  > Visiting: {inner_page_url}")
-
-                        try:
-                            inner_response = session.get(inner_page_url, timeout=20)
-                            inner_response.raise_for_status()
-                            inner_soup = BeautifulSoup(inner_response.content, "html.parser")
-
-                            # Find the first link whose href ends with ".pdf"
-                            pdf_link_tag = inner_soup.find("a", href=lambda href: href and ".pdf" in href)
-                            if pdf_link_tag:
-                                pdf_url = urljoin(BASE_URL, pdf_link_tag['href'])
-                                download_pdf(pdf_url, DOWNLOAD_DIR)
-                            else:
-                                print(f"    - No PDF link found on page.")
-                        
-                        except requests.exceptions.RequestException as e:
-                            print(f"  - Error accessing inner page {inner_page_url}: {e}")
-
-            # Find the "next page" link, identified by its image content
-            next_page_tag = soup.find("a", href=True, title="Next Page")
-            if next_page_tag:
-                current_page_url = urljoin(BASE_URL, next_page_tag["href"])
-                page_count += 1
-            else:
-                current_page_url = None
-                print("\n--- No 'Next Page' link found. Scraping complete. ---")
-
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Critical error accessing page {current_page_url}: {e}")
-            break
+    # The download pool has finished; report any download that failed in a way download_pdf didn't handle
+    for future in download_futures:
+        error = future.exception()
+        if error:
+            print(f"    ❌ Download failed unexpectedly: {error!r}")
 
 if __name__ == "__main__":
     scrape_website()
\ No newline at end of file
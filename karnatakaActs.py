@@ -1,158 +1,365 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import os
+import csv
 import re
+import shutil
 import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+BASE_URL = "https://www.latestlaws.com"
+LISTING_URL = f"{BASE_URL}/bare-acts/state-acts-rules/karnataka-state-laws/"
+DOWNLOAD_DIR = "karnataka_law"
+
+# Link classification patterns for act pages
+PDF_LINK_RE = re.compile(r'\.pdf$', re.IGNORECASE)
+GDRIVE_RE = re.compile(r'drive\.google\.com')
+GDRIVE_ID_RE = re.compile(r'/d/([a-zA-Z0-9_-]+)')
+# Confirm token in the warning page's download link (confirm=...) or form field (name="confirm" value="...")
+GDRIVE_CONFIRM_RE = re.compile(r'confirm(?:=|" value=")([0-9A-Za-z_-]+)')
+
+# Filename sanitizing: invalid characters are deleted, whitespace runs become "_"
+INVALID_FILENAME_CHARS = str.maketrans('', '', '\\/*?:"<>|')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Tags kept when parsing an act page
+ACT_PAGE_STRAINER = SoupStrainer(['a', 'iframe'])
+
+# Only the act list is parsed from the listing page
+LISTING_STRAINER = SoupStrainer('ul', id='act_child_list')
+
+# Act pages processed concurrently; kept small to stay polite to the site
+ACT_WORKERS = 6
+
+# PDFs downloaded concurrently, separately from act page parsing
+DOWNLOAD_WORKERS = 4
+
+# Columns of the downloaded-files log
+DOWNLOAD_LOG_FIELDS = ["Act Title", "Saved Filename", "Source URL"]
+
+# Columns of the CSV listing acts that can only be viewed online
+VIEWING_FIELDS = ["Act Title", "Page URL", "Link Type", "Viewer URL"]
+
+# Buffer size used when writing a downloaded PDF to disk
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Browser-like headers sent with every request
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# One session for every request so connections to latestlaws.com are pooled and kept alive
+session = requests.Session()
+session.headers.update(HEADERS)
+
+# Retry transient failures with backoff instead of skipping the act
+adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=1.0,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True  # Wait as long as a throttling server asks
+    )
+)
+session.mount('https://', adapter)
+session.mount('http://', adapter)
+
+# Minimum spacing between request starts to the same host, replacing a fixed sleep after every act
+MIN_REQUEST_INTERVAL = 1.0
+next_request_time = {}
+next_request_lock = threading.Lock()
+
+def wait_for_host_turn(url):
+    """Sleeps only as long as needed to keep requests to the URL's host MIN_REQUEST_INTERVAL apart."""
+    host = urlparse(url).netloc
+    with next_request_lock:
+        start_at = max(time.monotonic(), next_request_time.get(host, 0.0))
+        next_request_time[host] = start_at + MIN_REQUEST_INTERVAL
+
+    wait = start_at - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
 
 def sanitize_filename(name):
     """Removes invalid characters from a string to create a valid filename."""
-    name = re.sub(r'[\\/*?:"<>|]', "", name)
-    name = re.sub(r'\s+', '_', name)
-    return name[:150] + ".pdf"
+    name = name.translate(INVALID_FILENAME_CHARS)
+    return WHITESPACE_RE.sub('_', name)[:150] + ".pdf"
+
+def is_html_response(response):
+    """Checks whether a response is an HTML page rather than a file."""
+    return response.headers.get('Content-Type', '').lower().startswith('text/html')
+
+def get_gdrive_confirm_token(response):
+    """Returns the confirm token from Google Drive's large-file warning page, if there is one."""
+    for name, value in response.cookies.items():
+        if name.startswith('download_warning'):
+            return value
+    match = GDRIVE_CONFIRM_RE.search(response.text)
+    return match.group(1) if match else None
+
+def read_logged_filenames(log_filename):
+    """Returns the filenames recorded as fully downloaded in the downloads log."""
+    if not os.path.exists(log_filename):
+        return set()
+    with open(log_filename, newline='', encoding='utf-8') as f:
+        return {row["Saved Filename"] for row in csv.DictReader(f) if row.get("Saved Filename")}
+
+def remote_size_matches(url, filepath):
+    """Checks with a HEAD request whether the file on disk is as large as the remote one."""
+    try:
+        wait_for_host_turn(url)
+        head = session.head(url, allow_redirects=True, timeout=10)
+        content_length = head.headers.get('Content-Length')
+        return head.ok and content_length is not None and int(content_length) == os.path.getsize(filepath)
+    except (requests.exceptions.RequestException, ValueError):
+        return False
 
 def download_file(url, filepath):
     """Downloads a file from a URL and saves it to a specified path."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    part_path = filepath + ".part"
     try:
-        # Using a session object for potentially better handling of cookies/redirects
-        with requests.Session() as s:
-            response = s.get(url, headers=headers, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        # A file left by an earlier run is kept if it is complete, saving the full GET
+        if os.path.exists(filepath) and remote_size_matches(url, filepath):
+            print(f"      ---> ⏭️  {filepath} is already complete, skipping download")
+            return True
+
+        # The shared session handles cookies/redirects and reuses the pooled connection
+        wait_for_host_turn(url)
+        response = session.get(url, stream=True, timeout=30)
+        response.raise_for_status()
+
+        # Large Google Drive files answer with an HTML "can't scan for viruses" page; follow its confirm token
+        if is_html_response(response) and GDRIVE_RE.search(url):
+            token = get_gdrive_confirm_token(response)
+            if token:
+                print("      ---> Google Drive asked for confirmation, retrying with its token")
+                wait_for_host_turn(url)
+                response = session.get(url, params={'confirm': token}, stream=True, timeout=30)
+                response.raise_for_status()
+
+        # Never save an HTML error or interstitial page as a .pdf
+        if is_html_response(response):
+            response.close()
+            print(f"      ---> ❌ Failed to download {url}. Error: received an HTML page instead of a file")
+            return False
+
+        # Copy the body in C in 1 MiB blocks; decode_content undoes any content encoding urllib3 advertised
+        response.raw.decode_content = True
+        # Write to a temporary name so an interrupted download is never mistaken for a finished one
+        with open(part_path, 'wb') as f:
+            shutil.copyfileobj(response.raw, f, length=COPY_BUFFER_SIZE)
+        os.replace(part_path, filepath)
         print(f"      ---> ✅ Successfully downloaded to {filepath}")
         return True
-    except requests.exceptions.RequestException as e:
+    # Reading response.raw directly raises urllib3's own errors (truncated body, read timeout), not requests'
+    except (requests.exceptions.RequestException, Urllib3HTTPError, OSError) as e:
         print(f"      ---> ❌ Failed to download {url}. Error: {e}")
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
         return False
 
+def process_act(index, total, act_title, act_url):
+    """
+    Finds the PDF for a single act page.
+
+    Returns a (download_job, non_downloadable_entry) pair; either may be None. A download
+    job is a (download_url, filepath, log_entry) tuple for the download pool.
+    """
+    print(f"\n[{index}/{total}] Processing: {act_title}")
+
+    try:
+        wait_for_host_turn(act_url)
+        act_response = session.get(act_url, timeout=20)
+        act_response.raise_for_status()
+        # Only links and iframes are ever inspected, so skip building the rest of the tree
+        act_soup = BeautifulSoup(act_response.content, 'lxml', parse_only=ACT_PAGE_STRAINER)
+
+        # --- SMART PDF FINDING LOGIC ---
+
+        # Walk the links and iframes once, remembering the first candidate of each kind
+        direct_pdf_url = None
+        gdrive_src_url = None
+        gdrive_href_url = None
+        scribd_iframe = None
+        for tag in act_soup.find_all(['a', 'iframe']):
+            href = tag.get('href')
+            src = tag.get('src')
+
+            if tag.name == 'a' and href and PDF_LINK_RE.search(href):
+                # A direct PDF takes priority over everything else
+                direct_pdf_url = href
+                break
+            if gdrive_src_url is None and src and GDRIVE_RE.search(src):
+                gdrive_src_url = src
+            if gdrive_href_url is None and tag.name == 'a' and href and GDRIVE_RE.search(href):
+                gdrive_href_url = src or href
+            if scribd_iframe is None and tag.name == 'iframe' and 'scribd_iframe_embed' in tag.get('class', []):
+                scribd_iframe = tag
+
+        # 1. Check for Direct PDF Links (ends with .pdf)
+        if direct_pdf_url:
+            pdf_url = direct_pdf_url
+            if not pdf_url.startswith('http'):
+                pdf_url = f"{BASE_URL}{pdf_url}"
+            print(f"   --> Found Direct PDF Link: {pdf_url}")
+            filename = sanitize_filename(act_title)
+            filepath = os.path.join(DOWNLOAD_DIR, filename)
+            log_entry = {"Act Title": act_title, "Saved Filename": filename, "Source URL": pdf_url}
+            return (pdf_url, filepath, log_entry), None
+
+        # 2. If not found, check for Google Drive Links (iframe/anchor src first, then anchor href)
+        gdrive_url = gdrive_src_url or gdrive_href_url
+        if gdrive_url:
+            # Extract the file ID from the URL
+            match = GDRIVE_ID_RE.search(gdrive_url)
+            if match:
+                file_id = match.group(1)
+                # Construct the direct download link
+                download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+                print(f"   --> Found Google Drive Link. Attempting download from: {download_url}")
+
+                filename = sanitize_filename(act_title)
+                filepath = os.path.join(DOWNLOAD_DIR, filename)
+                log_entry = {"Act Title": act_title, "Saved Filename": filename, "Source URL": gdrive_url}
+                return (download_url, filepath, log_entry), None
+
+        # 3. If not found, check for Scribd Links
+        if scribd_iframe:
+            viewer_url = scribd_iframe.get('src')
+            print(f"   --> Found Scribd Viewer. Logging to CSV.")
+            return None, {"Act Title": act_title, "Page URL": act_url, "Link Type": "Scribd Viewer", "Viewer URL": viewer_url}
+
+        # 4. If nothing is found
+        print("   --> No downloadable link or viewer found.")
+        return None, {"Act Title": act_title, "Page URL": act_url, "Link Type": "Not Found", "Viewer URL": "N/A"}
+
+    except requests.exceptions.RequestException as e:
+        print(f"   --> ❌ Failed to process page {act_url}. Error: {e}")
+        return None, None
+
+def log_finished_downloads(download_futures, log_writer, log_file, wait_for_all=False):
+    """
+    Logs successful downloads that have finished, removing them from download_futures.
+    Only already finished downloads are handled unless wait_for_all is set. Returns the number logged.
+    """
+    if wait_for_all:
+        finished = as_completed(list(download_futures))
+    else:
+        finished = wait(download_futures, timeout=0).done
+
+    logged_count = 0
+    for future in finished:
+        log_entry = download_futures.pop(future)
+        if future.result():
+            log_writer.writerow(log_entry)
+            log_file.flush()
+            logged_count += 1
+    return logged_count
+
 def scrape_latest_laws():
     """
     Scrapes Karnataka law acts. It intelligently finds and downloads direct PDFs
     and Google Drive files, while logging non-downloadable links.
     """
-    base_url = "https://www.latestlaws.com"
-    listing_url = f"{base_url}/bare-acts/state-acts-rules/karnataka-state-laws/"
-    download_dir = "karnataka_law"
-
-    os.makedirs(download_dir, exist_ok=True)
-    print(f"📁 PDFs will be saved in the '{download_dir}' directory.")
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    print(f"📁 PDFs will be saved in the '{DOWNLOAD_DIR}' directory.")
 
     try:
-        print(f"Fetching main listing page: {listing_url}")
-        response = requests.get(listing_url, headers=headers)
+        print(f"Fetching main listing page: {LISTING_URL}")
+        response = session.get(LISTING_URL, timeout=20)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Fatal Error: Could not fetch the main page. {e}")
         return
 
-    soup = BeautifulSoup(response.content, 'html.parser')
+    soup = BeautifulSoup(response.content, 'lxml', parse_only=LISTING_STRAINER)
     act_list_container = soup.find('ul', id='act_child_list')
     if not act_list_container:
         print("Fatal Error: Could not find the list of acts. Website structure may have changed.")
         return
 
-    act_links = act_list_container.find_all('a')
+    # Anchors without an href can't be visited (and would crash the URL handling below)
+    act_links = act_list_container.find_all('a', href=True)
     print(f"Found {len(act_links)} acts to process.")
 
-    non_downloadable_links = []
-    downloaded_files_log = []
+    # PDFs an earlier run logged as complete are skipped without fetching their act page.
+    # Files on disk that were never logged may be truncated; download_file checks their size.
+    log_filename = "karnataka_acts_downloaded.csv"
+    already_downloaded = set(os.listdir(DOWNLOAD_DIR)) & read_logged_filenames(log_filename)
 
-    for i, link in enumerate(act_links):
+    acts = []
+    for link in act_links:
         act_title = link.text.strip()
-        act_url = link.get('href')
+        if sanitize_filename(act_title) in already_downloaded:
+            continue
+        act_url = link['href']
         if not act_url.startswith('http'):
-            act_url = f"{base_url}{act_url}"
+            act_url = f"{BASE_URL}{act_url}"
+        acts.append((act_title, act_url))
 
-        print(f"\n[{i+1}/{len(act_links)}] Processing: {act_title}")
+    if len(acts) < len(act_links):
+        print(f"⏭️  Skipping {len(act_links) - len(acts)} acts already downloaded.")
 
-        try:
-            act_response = requests.get(act_url, headers=headers, timeout=20)
-            act_response.raise_for_status()
-            act_soup = BeautifulSoup(act_response.content, 'html.parser')
+    non_downloadable_count = 0
+    downloaded_count = 0
 
-            found_link = False
+    # Downloads are logged as they happen (header written once) so an interrupted run keeps its progress
+    write_log_header = not os.path.exists(log_filename) or os.path.getsize(log_filename) == 0
 
-            # --- SMART PDF FINDING LOGIC ---
+    # Non-downloadable acts are always revisited, so their CSV is rewritten each run
+    view_filename = "karnataka_acts_for_viewing.csv"
 
-            # 1. Check for Direct PDF Links (ends with .pdf)
-            direct_pdf_tag = act_soup.find('a', href=re.compile(r'\.pdf$', re.IGNORECASE))
-            if direct_pdf_tag:
-                pdf_url = direct_pdf_tag.get('href')
-                if not pdf_url.startswith('http'):
-                    pdf_url = f"{base_url}{pdf_url}"
-                print(f"   --> Found Direct PDF Link: {pdf_url}")
-                filename = sanitize_filename(act_title)
-                filepath = os.path.join(download_dir, filename)
-                if download_file(pdf_url, filepath):
-                    downloaded_files_log.append({"Act Title": act_title, "Saved Filename": filename, "Source URL": pdf_url})
-                found_link = True
-
-            # 2. If not found, check for Google Drive Links
-            if not found_link:
-                # Search in both iframes and anchor tags for Google Drive links
-                gdrive_tag = act_soup.find(['iframe', 'a'], {'src': re.compile(r'drive\.google\.com')}) or \
-                             act_soup.find('a', {'href': re.compile(r'drive\.google\.com')})
-
-                if gdrive_tag:
-                    gdrive_url = gdrive_tag.get('src') or gdrive_tag.get('href')
-                    # Extract the file ID from the URL
-                    match = re.search(r'/d/([a-zA-Z0-9_-]+)', gdrive_url)
-                    if match:
-                        file_id = match.group(1)
-                        # Construct the direct download link
-                        download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-                        print(f"   --> Found Google Drive Link. Attempting download from: {download_url}")
-                        
-                        filename = sanitize_filename(act_title)
-                        filepath = os.path.join(download_dir, filename)
-                        if download_file(download_url, filepath):
-                             downloaded_files_log.append({"Act Title": act_title, "Saved Filename": filename, "Source URL": gdrive_url})
-                        found_link = True
-
-            # 3. If not found, check for Scribd Links
-            if not found_link:
-                iframe = act_soup.find('iframe', class_='scribd_iframe_embed')
-                if iframe:
-                    viewer_url = iframe.get('src')
-                    print(f"   --> Found Scribd Viewer. Logging to CSV.")
-                    non_downloadable_links.append({"Act Title": act_title, "Page URL": act_url, "Link Type": "Scribd Viewer", "Viewer URL": viewer_url})
-                    found_link = True
-            
-            # 4. If nothing is found
-            if not found_link:
-                print("   --> No downloadable link or viewer found.")
-                non_downloadable_links.append({"Act Title": act_title, "Page URL": act_url, "Link Type": "Not Found", "Viewer URL": "N/A"})
-            
-            # A small delay to be polite to the server
-            time.sleep(1)
-
-        except requests.exceptions.RequestException as e:
-            print(f"   --> ❌ Failed to process page {act_url}. Error: {e}")
-
-    # --- Save results to CSV files ---
-    if non_downloadable_links:
-        df_view = pd.DataFrame(non_downloadable_links)
-        view_filename = "karnataka_acts_for_viewing.csv"
-        df_view.to_csv(view_filename, index=False, encoding='utf-8')
-        print(f"\n📄 Saved {len(non_downloadable_links)} non-downloadable links to '{view_filename}'")
-        
-    if downloaded_files_log:
-        df_log = pd.DataFrame(downloaded_files_log)
-        log_filename = "karnataka_acts_downloaded.csv"
-        df_log.to_csv(log_filename, index=False, encoding='utf-8')
-        print(f"💾 Saved a log of {len(downloaded_files_log)} downloaded files to '{log_filename}'")
-
-    print(f"\n🎉 Scraping complete! {len(downloaded_files_log)} files downloaded.")
+    # Downloads run on their own pool so a large PDF doesn't hold up parsing of the next act pages
+    with ThreadPoolExecutor(max_workers=ACT_WORKERS) as executor, \
+            ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as download_executor, \
+            open(log_filename, 'a', newline='', encoding='utf-8') as log_file, \
+            open(view_filename, 'w', newline='', encoding='utf-8') as view_file:
+        log_writer = csv.DictWriter(log_file, fieldnames=DOWNLOAD_LOG_FIELDS)
+        if write_log_header:
+            log_writer.writeheader()
+        view_writer = csv.DictWriter(view_file, fieldnames=VIEWING_FIELDS)
+        view_writer.writeheader()
+
+        # Act pages are independent, so process a few at a time; results keep the listing order
+        results = executor.map(
+            lambda item: process_act(item[0] + 1, len(acts), *item[1]), enumerate(acts)
+        )
+        download_futures = {}
+        # Acts whose titles sanitize to the same filename must not write the same .part file at once
+        queued_filepaths = set()  # Lowercased, since some filesystems are case-insensitive
+        for download_job, non_downloadable_entry in results:
+            if download_job:
+                download_url, filepath, log_entry = download_job
+                if filepath.lower() in queued_filepaths:
+                    print(f"   --> ⏭️  Skipping {download_url}: '{filepath}' is already being downloaded for another act.")
+                else:
+                    queued_filepaths.add(filepath.lower())
+                    download_futures[download_executor.submit(download_file, download_url, filepath)] = log_entry
+            if non_downloadable_entry:
+                view_writer.writerow(non_downloadable_entry)
+                non_downloadable_count += 1
+            # Log downloads that finished while act pages were being parsed
+            downloaded_count += log_finished_downloads(download_futures, log_writer, log_file)
+
+        downloaded_count += log_finished_downloads(download_futures, log_writer, log_file, wait_for_all=True)
+
+    # --- Report the CSV files written above ---
+    if non_downloadable_count:
+        print(f"\n📄 Saved {non_downloadable_count} non-downloadable links to '{view_filename}'")
+
+    if downloaded_count:
+        print(f"💾 Logged {downloaded_count} downloaded files to '{log_filename}'")
+
+    print(f"\n🎉 Scraping complete! {downloaded_count} files downloaded.")
 
 if __name__ == "__main__":
     scrape_latest_laws()
\ No newline at end of file
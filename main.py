@@ -426,10 +426,115 @@
 #     main()
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import os
+import re
+import shutil
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import chain
+
+# Quoted .pdf URL inside an onclick handler
+PDF_URL_RE = re.compile(r"['\"]([^'\"]*\.pdf[^'\"]*)['\"]", re.IGNORECASE)
+
+# Links treated as PDFs: a ".pdf" path (optionally followed by a query or fragment) or a
+# filetype=pdf / format=pdf parameter
+PDF_HREF_RE = re.compile(r"\.pdf(?:$|[?#])|(?:filetype|format)=pdf", re.IGNORECASE)
+
+# Content types worth parsing for links
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml')
+
+# Shared session so the page fetch and every download reuse pooled keep-alive connections
+session = requests.Session()
+session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+
+# Retry transient failures with backoff instead of failing the PDF outright
+adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+session.mount('http://', adapter)
+session.mount('https://', adapter)
+
+# Concurrent downloads overall, and per host so a single server isn't flooded
+DOWNLOAD_WORKERS = 8
+PER_HOST_DOWNLOADS = 2
+host_semaphores = {}
+host_semaphores_lock = threading.Lock()
+
+# Minimum spacing between request starts to the same host, tracked with time.monotonic()
+PER_HOST_DELAY = 1.0
+host_next_request = {}
+host_schedule_lock = threading.Lock()
+
+# Buffer size used when writing a downloaded PDF to disk
+COPY_BUFFER_SIZE = 1024 * 1024
+
+@dataclass
+class PageScan:
+    """Link-bearing attribute values of a page, gathered into flat lists in one traversal"""
+    hrefs: list[str] = field(default_factory=list)
+    onclicks: list[str] = field(default_factory=list)
+
+def scan_page(soup):
+    """
+    Walk the parsed page once, collecting every link href and onclick handler
+
+    Args:
+        soup (BeautifulSoup): Parsed HTML of the page
+
+    Returns:
+        PageScan: The collected attribute values
+    """
+    scan = PageScan()
+    for element in soup.select('a[href], [onclick]'):
+        if element.name == 'a' and element.has_attr('href'):
+            scan.hrefs.append(element['href'])
+        onclick = element.get('onclick')
+        if onclick:
+            scan.onclicks.append(onclick)
+    return scan
+
+def find_pdf_links_in_soup(url, soup):
+    """
+    Find PDF links in a parsed page's hrefs and onclick handlers
+
+    Args:
+        url (str): URL of the page, used to resolve relative links
+        soup (BeautifulSoup): Parsed HTML of the page
+
+    Returns:
+        list: PDF URLs found
+    """
+    scan = scan_page(soup)
+
+    pdf_links = []
+    seen_links = set()  # Membership checks against the ordered list would be O(N) each
+
+    # Filter the flat string lists; repeated values are dropped before urljoin
+    href_urls = [href for href in dict.fromkeys(scan.hrefs) if PDF_HREF_RE.search(href)]
+    onclick_urls = dict.fromkeys(chain.from_iterable(
+        PDF_URL_RE.findall(onclick) for onclick in scan.onclicks if '.pdf' in onclick.lower()
+    ))
+
+    for refs, label in ((href_urls, "Found PDF"), (onclick_urls, "Found PDF in onclick")):
+        for ref in refs:
+            # Convert relative URLs to absolute URLs
+            absolute_url = urljoin(url, ref)
+            if absolute_url not in seen_links:
+                seen_links.add(absolute_url)
+                pdf_links.append(absolute_url)
+                print(f"{label}: {absolute_url}")
+
+    return pdf_links
 
 def extract_pdf_links(url, download=False, output_dir="pdfs"):
     """
@@ -446,46 +551,21 @@ def extract_pdf_links(url, download=False, output_dir="pdfs"):
 
     try:
         # Send GET request to the website
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
         print(f"Fetching webpage: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
+        response = session.get(url, timeout=10, stream=True)
         response.raise_for_status()
 
-        # Parse HTML content
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find all links
-        links = soup.find_all('a', href=True)
-
-        pdf_links = []
+        # Only pull the body if it is HTML; a binary file or other declared content is closed unread.
+        # A response without a Content-Type is parsed as before.
+        content_type = response.headers.get('content-type', '').lower()
+        if content_type and not content_type.startswith(HTML_CONTENT_TYPES):
+            response.close()
+            print(f"Not an HTML page (content type: {content_type}), skipping")
+            return []
 
-        for link in links:
-            href = link['href']
-
-            # Convert relative URLs to absolute URLs
-            absolute_url = urljoin(url, href)
-
-            # Check if link points to a PDF
-            if href.lower().endswith('.pdf') or 'pdf' in href.lower():
-                pdf_links.append(absolute_url)
-                print(f"Found PDF: {absolute_url}")
-
-        # Also check for links in JavaScript or other attributes
-        # Look for PDF links in onclick, data attributes, etc.
-        for element in soup.find_all(attrs={"onclick": True}):
-            onclick = element.get('onclick', '')
-            if '.pdf' in onclick.lower():
-                # Extract URL from onclick (basic extraction)
-                import re
-                urls = re.findall(r"['\"]([^'\"]*\.pdf[^'\"]*)['\"]", onclick, re.IGNORECASE)
-                for pdf_url in urls:
-                    absolute_url = urljoin(url, pdf_url)
-                    if absolute_url not in pdf_links:
-                        pdf_links.append(absolute_url)
-                        print(f"Found PDF in onclick: {absolute_url}")
+        # Parse HTML content with the C-backed lxml parser
+        soup = BeautifulSoup(response.content, 'lxml')
+        pdf_links = find_pdf_links_in_soup(url, soup)
 
         print(f"\nTotal PDFs found: {len(pdf_links)}")
 
@@ -501,54 +581,139 @@ def extract_pdf_links(url, download=False, output_dir="pdfs"):
         print(f"An error occurred: {e}")
         return []
 
-def download_pdfs(pdf_links, output_dir="pdfs"):
+def get_host_semaphore(pdf_url):
+    """Return the semaphore limiting concurrent downloads from a URL's host"""
+    host = urlparse(pdf_url).netloc
+    with host_semaphores_lock:
+        if host not in host_semaphores:
+            host_semaphores[host] = threading.Semaphore(PER_HOST_DOWNLOADS)
+        return host_semaphores[host]
+
+def wait_for_host_turn(pdf_url):
+    """Sleep until the URL's host may receive another request, spacing requests PER_HOST_DELAY apart"""
+    host = urlparse(pdf_url).netloc
+    with host_schedule_lock:
+        start_at = max(time.monotonic(), host_next_request.get(host, 0.0))
+        host_next_request[host] = start_at + PER_HOST_DELAY
+
+    wait = start_at - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+
+def download_pdf(pdf_url, index, total, output_dir, filename=None):
     """
-    Download PDFs from a list of URLs
+    Download a single PDF
 
     Args:
-        pdf_links (list): List of PDF URLs to download
-        output_dir (str): Directory to save the PDFs
+        pdf_url (str): URL of the PDF
+        index (int): Position of the PDF in the list, used for fallback filenames
+        total (int): Number of PDFs being downloaded
+        output_dir (str): Directory to save the PDF
+        filename (str): Name to save the PDF under (derived from the URL if not given)
+
+    Returns:
+        bool: True if the PDF was saved
     """
+    try:
+        filename = filename or pdf_filename(pdf_url, index)
+        filepath = os.path.join(output_dir, filename)
 
-    # Create output directory if it doesn't exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"Created directory: {output_dir}")
+        # Different hosts download in parallel; each host only sees a few requests at a time
+        with get_host_semaphore(pdf_url):
+            # Be respectful to the server without stalling downloads from other hosts
+            wait_for_host_turn(pdf_url)
+            print(f"Downloading {index}/{total}: {pdf_url}")
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+            # Download the PDF
+            response = session.get(pdf_url, stream=True, timeout=30)
+            response.raise_for_status()
 
-    for i, pdf_url in enumerate(pdf_links, 1):
-        try:
-            print(f"Downloading {i}/{len(pdf_links)}: {pdf_url}")
+            # Save the PDF, copying the body in C in 1 MiB blocks
+            response.raw.decode_content = True
+            with open(filepath, 'wb', buffering=COPY_BUFFER_SIZE) as f:
+                # Hint the kernel that the file is written sequentially (not available on every OS)
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                shutil.copyfileobj(response.raw, f, length=COPY_BUFFER_SIZE)
 
-            # Get filename from URL
-            parsed_url = urlparse(pdf_url)
-            filename = os.path.basename(parsed_url.path)
+            print(f"✓ Downloaded: {filename}")
 
-            # If no filename, create one
-            if not filename or not filename.endswith('.pdf'):
-                filename = f"document_{i}.pdf"
+        return True
 
-            filepath = os.path.join(output_dir, filename)
+    except Exception as e:
+        print(f"✗ Failed to download {pdf_url}: {e}")
+        return False
 
-            # Download the PDF
-            response = requests.get(pdf_url, headers=headers, stream=True, timeout=30)
-            response.raise_for_status()
+def pdf_filename(pdf_url, index):
+    """
+    Derive the local filename for a PDF from its URL
+
+    Args:
+        pdf_url (str): URL of the PDF
+        index (int): Position of the PDF in the download list, used when the URL has no filename
 
-            # Save the PDF
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+    Returns:
+        str: The filename
+    """
+    # Get filename from URL
+    filename = os.path.basename(urlparse(pdf_url).path)
 
-            print(f"✓ Downloaded: {filename}")
+    # If no filename, create one
+    if not filename or not filename.endswith('.pdf'):
+        filename = f"document_{index}.pdf"
+
+    return filename
+
+def unique_pdf_filenames(pdf_links):
+    """
+    Assign every PDF a distinct filename, suffixing the index when URLs share a basename
+
+    Args:
+        pdf_links (list): List of PDF URLs
+
+    Returns:
+        list: One filename per URL, in the same order
+    """
+    filenames = []
+    taken = set()  # Lowercased, since some filesystems are case-insensitive
+    for i, pdf_url in enumerate(pdf_links, 1):
+        filename = pdf_filename(pdf_url, i)
+        stem, extension = os.path.splitext(filename)
+        suffix = i
+        while filename.lower() in taken:
+            filename = f"{stem}_{suffix}{extension}"
+            suffix += 1
+        taken.add(filename.lower())
+        filenames.append(filename)
+    return filenames
+
+def download_pdfs(pdf_links, output_dir="pdfs", max_workers=DOWNLOAD_WORKERS):
+    """
+    Download PDFs from a list of URLs
+
+    Args:
+        pdf_links (list): List of PDF URLs to download
+        output_dir (str): Directory to save the PDFs
+        max_workers (int): Number of concurrent downloads
+    """
+
+    # Create output directory if it doesn't exist
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(f"Created directory: {output_dir}")
+
+    # Concurrent downloads must never share a target file (e.g. /2023/report.pdf and /2024/report.pdf)
+    filenames = unique_pdf_filenames(pdf_links)
 
-            # Small delay to be respectful to the server
-            time.sleep(1)
+    # Downloads are network-bound, so run them on a thread pool sharing the session's connection pool
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(download_pdf, pdf_url, i, len(pdf_links), output_dir, filename)
+            for i, (pdf_url, filename) in enumerate(zip(pdf_links, filenames), 1)
+        ]
+        successful = sum(future.result() for future in as_completed(futures))
 
-        except Exception as e:
-            print(f"✗ Failed to download {pdf_url}: {e}")
+    print(f"\nDownloaded {successful}/{len(pdf_links)} PDFs to {output_dir}")
 
 def main():
     """